@@ -1,100 +1,101 @@
 import numpy as np
-import matplotlib.pyplot as plt
 import math
 import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from stats import calculate_entropy
+from bwt import bwt_transform
+from mtf import mtf_transform
 
-def bwt_transform(data: bytes) -> tuple[bytes, int]:
-    """Преобразование Барроуза-Уилера"""
-    # Создаем все возможные повороты строки
-    rotations = [data[i:] + data[:i] for i in range(len(data))]
-    # Сортируем повороты
-    rotations.sort()
-    # Находим индекс исходной строки
-    original_index = rotations.index(data)
-    # Берем последний символ каждого поворота
-    transformed = bytes(rotation[-1] for rotation in rotations)
-    return transformed, original_index
-
-def mtf_encode(data: bytes) -> bytes:
-    """Move-to-Front кодирование"""
-    # Инициализируем алфавит
-    alphabet = list(range(256))
-    result = bytearray()
-    
-    # Кодируем каждый символ
-    for byte in data:
-        # Находим позицию символа в алфавите
-        index = alphabet.index(byte)
-        result.append(index)
-        # Перемещаем символ в начало алфавита
-        alphabet.pop(index)
-        alphabet.insert(0, byte)
-    
-    return bytes(result)
-
-def calculate_entropy(data: bytes) -> float:
-    """Вычисляет энтропию данных"""
-    # Подсчет частот символов
-    counter = np.zeros(256, dtype=int)
-    for byte in data:
-        counter[byte] += 1
-    
-    # Вычисление энтропии
-    total_symbols = len(data)
-    entropy = 0.0
-    for count in counter:
-        if count > 0:
-            probability = count / total_symbols
-            entropy -= probability * math.log2(probability)
-    return entropy
-
-def process_block_and_get_entropy(data: bytes, block_size: int) -> float:
-    """Обрабатывает данные блоками и возвращает среднюю энтропию"""
-    total_entropy = 0
-    block_count = 0
-    
-    # Обработка каждого блока
-    for i in range(0, len(data), block_size):
-        block = data[i:i + block_size]
-        if len(block) < block_size:  # Пропускаем неполный последний блок
-            continue
-            
-        # Применяем BWT и MTF к блоку
-        transformed_data, _ = bwt_transform(block)
-        mtf_data = mtf_encode(transformed_data)
-        
-        # Вычисляем энтропию преобразованного блока
-        entropy = calculate_entropy(mtf_data)
-        total_entropy += entropy
-        block_count += 1
-        
-        # Выводим прогресс
-        print(f"Обработано блоков: {block_count}", end='\r')
-    
-    print()  # Новая строка после прогресса
-    return total_entropy / block_count if block_count > 0 else 0
+# Результаты по блокам кэшируются по хэшу содержимого блока (SHA-1),
+# поэтому повторный анализ и более мелкие сетки размеров не пересчитывают
+# уже обработанные блоки. Кэш хранится в JSON-файле рядом с графиком.
+ENTROPY_CACHE_FILE = 'entropy_cache.json'
+# Размеры блоков для анализа по умолчанию
+BLOCK_SIZES = [1 * 1024, 2 * 1024, 3 * 1024, 4 * 1024, 5 * 1024, 6 * 1024, 7 * 1024, 8 * 1024, 9 * 1024, 10 * 1024]
 
-def analyze_block_sizes():
-    # Проверяем наличие файла enwik7
-    if not os.path.exists('enwik7'):
-        print("Ошибка: файл enwik7 не найден!")
-        return
-    
-    # Читаем файл enwik7
-    print("Чтение файла enwik7...")
-    with open('enwik7', 'rb') as f:
+# Данные файла в процессе-обработчике (загружаются один раз при старте процесса)
+_worker_data = b""
+
+
+def _init_worker(file_path):
+    global _worker_data
+    with open(file_path, 'rb') as f:
+        _worker_data = f.read()
+
+
+def block_entropy(block: bytes) -> float:
+    """Энтропия блока после BWT и MTF."""
+    transformed_data, _ = bwt_transform(block)
+    return calculate_entropy(mtf_transform(transformed_data))
+
+
+def _job_entropy(job: tuple) -> float:
+    """Задание пула - (начало, размер) блока в файле, загруженном _init_worker."""
+    start, size = job
+    return block_entropy(_worker_data[start:start + size])
+
+
+def load_entropy_cache(cache_path=ENTROPY_CACHE_FILE) -> dict:
+    if not os.path.exists(cache_path):
+        return {}
+    with open(cache_path, 'r') as f:
+        return json.load(f)
+
+
+def save_entropy_cache(cache: dict, cache_path=ENTROPY_CACHE_FILE):
+    with open(cache_path, 'w') as f:
+        json.dump(cache, f)
+
+
+def sweep_block_sizes(file_path, block_sizes, workers=None, cache=None) -> list[float]:
+    """
+    Для каждого размера блока возвращает среднюю энтропию полных блоков файла
+    после BWT и MTF. Задания (начало, размер) всех размеров сразу отдаются
+    в пул из workers процессов; блоки, уже найденные в cache, не пересчитываются.
+    """
+    cache = {} if cache is None else cache
+    with open(file_path, 'rb') as f:
         data = f.read()
-    
-    # Определяем размеры блоков для анализа (от 1KB до 1MB)
-    block_sizes = [1 * 1024, 2 * 1024, 3 * 1024, 4 * 1024, 5 * 1024, 6 * 1024, 7 * 1024, 8 * 1024, 9 * 1024, 10 * 1024]
-    
-    # Вычисляем энтропию для каждого размера блока
-    entropies = []
+
+    # Хэши блоков; одинаковые блоки (и блоки из кэша) считаются один раз
+    block_hashes = {}
+    jobs = {}
     for size in block_sizes:
-        print(f"\nОбработка блоков размером {size/1024:.1f} KB...")
-        entropy = process_block_and_get_entropy(data, size)
-        entropies.append(entropy)
-        print(f"Средняя энтропия: {entropy:.4f} бит/символ")
+        hashes = []
+        for start in range(0, len(data) - size + 1, size):
+            key = hashlib.sha1(data[start:start + size]).hexdigest()
+            hashes.append(key)
+            if key not in cache and key not in jobs:
+                jobs[key] = (start, size)
+        block_hashes[size] = hashes
+
+    if jobs:
+        print(f"Блоков для обработки: {len(jobs)} (из кэша: {sum(map(len, block_hashes.values())) - len(jobs)})")
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(file_path,)) as executor:
+            chunksize = max(1, len(jobs) // (4 * (workers or os.cpu_count() or 1)))
+            for key, entropy in zip(jobs, executor.map(_job_entropy, jobs.values(), chunksize=chunksize)):
+                cache[key] = entropy
+
+    return [float(np.mean([cache[key] for key in block_hashes[size]])) if block_hashes[size] else 0.0
+            for size in block_sizes]
+
+
+def analyze_block_sizes(file_path='enwik7', block_sizes=BLOCK_SIZES, workers=None):
+    # matplotlib нужен только для графика - не загружаем его в процессах пула
+    import matplotlib.pyplot as plt
+
+    # Проверяем наличие файла (по умолчанию enwik7)
+    if not os.path.exists(file_path):
+        print(f"Ошибка: файл {file_path} не найден!")
+        return
+    
+    # Вычисляем энтропию для всех размеров блока (параллельно, с кэшем)
+    print(f"Обработка файла {file_path}...")
+    cache = load_entropy_cache()
+    entropies = sweep_block_sizes(file_path, block_sizes, workers, cache)
+    save_entropy_cache(cache)
     
     # Строим график
     plt.figure(figsize=(10, 6))
@@ -102,7 +103,7 @@ def analyze_block_sizes():
     plt.grid(True)
     plt.xlabel('Размер блока (байт)')
     plt.ylabel('Средняя энтропия (бит/символ)')
-    plt.title('Зависимость энтропии от размера блока для enwik7')
+    plt.title(f'Зависимость энтропии от размера блока для {file_path}')
     
     # Добавляем подписи размеров в KB/MB
     plt.xticks(block_sizes, [f'{size/1024:.0f}KB' if size < 1048576 else f'{size/1048576:.0f}MB' 
@@ -0,0 +1,56 @@
+import numpy as np
+
+# --- Упаковка малых алфавитов по битовым плоскостям ---
+#
+# В бинарных изображениях (bw_image.raw, binary_file.bin) встречается всего
+# несколько разных байт, но каждый пиксель занимает целый байт. Если в данных
+# m различных значений, каждое заменяется своим номером из k = ceil(log2 m) бит,
+# и номера раскладываются на k битовых плоскостей (сначала старшая), каждая
+# упаковывается np.packbits. RLE/LZ/Хаффман после этого обрабатывают в 8/k раз
+# меньше символов, а в плоскостях дольше сохраняются серии.
+#
+# Формат:
+#   1 байт - k (BITPLANE_RAW = 8: упаковка не выгодна, дальше исходные данные)
+#   1 байт - m, m байт - значения по возрастанию (номер значения - его позиция)
+#   4 байта - количество символов n
+#   k плоскостей по ceil(n / 8) байт
+
+BITPLANE_RAW = 8
+
+
+def bitplane_pack(data: bytes) -> bytes:
+    """Упаковывает данные с алфавитом не больше 128 значений по битовым плоскостям."""
+    symbols = np.frombuffer(data, dtype=np.uint8)
+    values, indices = np.unique(symbols, return_inverse=True)
+    bits = max(1, (len(values) - 1).bit_length())
+    if bits >= BITPLANE_RAW:
+        return bytes([BITPLANE_RAW]) + data
+
+    indices = indices.reshape(-1).astype(np.uint8)
+    header = bytes([bits, len(values)]) + values.tobytes() + len(symbols).to_bytes(4, 'big')
+    planes = [np.packbits((indices >> shift) & 1) for shift in range(bits - 1, -1, -1)]
+    return header + b"".join(plane.tobytes() for plane in planes)
+
+
+def bitplane_unpack(packed_data: bytes) -> bytes:
+    """Обратное преобразование bitplane_pack."""
+    bits = packed_data[0]
+    if bits == BITPLANE_RAW:
+        return packed_data[1:]
+    if bits == 0 or bits > BITPLANE_RAW:
+        raise ValueError(f"Некорректные данные битовых плоскостей: {bits} бит на символ")
+
+    count = packed_data[1]
+    values = np.frombuffer(packed_data, dtype=np.uint8, count=count, offset=2)
+    offset = 2 + count
+    n = int.from_bytes(packed_data[offset:offset + 4], 'big')
+    offset += 4
+    plane_size = (n + 7) // 8
+    if len(packed_data) < offset + bits * plane_size:
+        raise ValueError("Некорректные данные битовых плоскостей: обрезаны плоскости")
+
+    planes = np.frombuffer(packed_data, dtype=np.uint8, count=bits * plane_size, offset=offset)
+    indices = np.zeros(n, dtype=np.uint8)
+    for plane in planes.reshape(bits, plane_size):
+        indices = (indices << 1) | np.unpackbits(plane, count=n)
+    return values[indices].tobytes()
@@ -0,0 +1,178 @@
+import zlib
+from bisect import bisect_right
+from collections import deque
+from functools import partial
+
+# --- Параллельная обработка независимых блоков ---
+#
+# Блоки отдаются в пул процессов, но одновременно в работе не больше
+# max_in_flight блоков (остальные ещё не прочитаны из файла), а результаты
+# возвращаются строго в порядке блоков. Поэтому вывод совпадает байт в байт
+# с последовательной обработкой, а память ограничена размером очереди.
+#
+# Контейнер BWT-конвейеров:
+#   4 байта - размер блока
+#   для каждого блока: номер блока (4), номер исходной строки BWT (4),
+#   размер сжатых данных (4), сжатые данные
+#   индекс (в конце файла), для каждого блока: смещение заголовка блока в
+#   контейнере (8), смещение блока в исходном файле (8), размер сжатых данных (4),
+#   размер исходного блока (4), CRC32 исходного блока (4)
+#   4 байта - количество блоков, 4 байта - метка INDEX_MAGIC
+# По индексу нужный диапазон исходного файла восстанавливается без
+# декодирования предыдущих блоков.
+
+# Сколько блоков держать в работе на один процесс
+IN_FLIGHT_PER_WORKER = 2
+BLOCK_HEADER_SIZE = 12
+INDEX_ENTRY_SIZE = 28
+INDEX_MAGIC = b"BIDX"
+
+
+def read_blocks(source, block_size: int):
+    """Читает файловый объект порциями по block_size байт."""
+    while True:
+        block = source.read(block_size)
+        if not block:
+            break
+        yield block
+
+
+def map_ordered(function, items, executor=None, max_in_flight: int = IN_FLIGHT_PER_WORKER):
+    """
+    Применяет function к элементам items и выдаёт результаты по порядку.
+    С executor элементы обрабатываются параллельно, но в очереди не больше
+    max_in_flight задач: следующий элемент берётся из items только после того,
+    как готов самый старый результат.
+    """
+    if executor is None:
+        yield from map(function, items)
+        return
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(function, item))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _encode_block(function, block: bytes) -> tuple:
+    """Сжимает блок функцией конвейера и добавляет размер и CRC32 исходного блока."""
+    compressed_block, index = function(block)
+    return compressed_block, index, len(block), zlib.crc32(block)
+
+
+def write_container(source, destination, block_size: int, function, executor=None,
+                    max_in_flight: int = IN_FLIGHT_PER_WORKER) -> int:
+    """
+    Сжимает source поблочно в контейнер destination с индексом в конце.
+    function(block) -> (сжатые данные, индекс BWT) - функция верхнего уровня (для пула).
+    Возвращает количество записанных байт.
+    """
+    destination.write(block_size.to_bytes(4, 'big'))
+    offset = 4
+    uncompressed_offset = 0
+    entries = []
+    results = map_ordered(partial(_encode_block, function), read_blocks(source, block_size), executor,
+                          max_in_flight)
+    for block_number, (compressed_block, index, size, checksum) in enumerate(results):
+        destination.write(block_number.to_bytes(4, 'big'))
+        destination.write(index.to_bytes(4, 'big'))
+        destination.write(len(compressed_block).to_bytes(4, 'big'))
+        destination.write(compressed_block)
+        entries.append((offset, uncompressed_offset, len(compressed_block), size, checksum))
+        offset += BLOCK_HEADER_SIZE + len(compressed_block)
+        uncompressed_offset += size
+
+    for block_offset, block_start, compressed_size, size, checksum in entries:
+        destination.write(block_offset.to_bytes(8, 'big'))
+        destination.write(block_start.to_bytes(8, 'big'))
+        destination.write(compressed_size.to_bytes(4, 'big'))
+        destination.write(size.to_bytes(4, 'big'))
+        destination.write(checksum.to_bytes(4, 'big'))
+    destination.write(len(entries).to_bytes(4, 'big'))
+    destination.write(INDEX_MAGIC)
+    return offset + len(entries) * INDEX_ENTRY_SIZE + 8
+
+
+def read_index(source) -> tuple[int, list[tuple[int, int, int, int, int]]]:
+    """
+    Читает размер блока и индекс из конца контейнера, не трогая данные блоков.
+    Элемент индекса - (смещение заголовка блока, смещение в исходном файле,
+    размер сжатых данных, размер исходного блока, CRC32).
+    """
+    block_size = int.from_bytes(source.read(4), 'big')
+    source.seek(-8, 2)
+    trailer = source.read(8)
+    if trailer[4:] != INDEX_MAGIC:
+        raise ValueError("Некорректный контейнер: нет индекса блоков")
+    count = int.from_bytes(trailer[:4], 'big')
+    source.seek(-8 - count * INDEX_ENTRY_SIZE, 2)
+    data = source.read(count * INDEX_ENTRY_SIZE)
+    entries = []
+    for position in range(0, len(data), INDEX_ENTRY_SIZE):
+        entry = data[position:position + INDEX_ENTRY_SIZE]
+        entries.append((int.from_bytes(entry[0:8], 'big'), int.from_bytes(entry[8:16], 'big'),
+                        int.from_bytes(entry[16:20], 'big'), int.from_bytes(entry[20:24], 'big'),
+                        int.from_bytes(entry[24:28], 'big')))
+    return block_size, entries
+
+
+def read_block_payloads(source, entries):
+    """Читает блоки по индексу; выдаёт (сжатые данные, индекс BWT)."""
+    for block_offset, _, compressed_size, _, _ in entries:
+        source.seek(block_offset)
+        header = source.read(BLOCK_HEADER_SIZE)
+        compressed_block = source.read(compressed_size)
+        if len(header) < BLOCK_HEADER_SIZE or len(compressed_block) < compressed_size:
+            raise ValueError("Некорректный контейнер: обрезаны данные блока")
+        yield compressed_block, int.from_bytes(header[4:8], 'big')
+
+
+def _check_block(block: bytes, entry: tuple) -> bytes:
+    """Сверяет восстановленный блок с размером и CRC32 из индекса."""
+    if len(block) != entry[3] or zlib.crc32(block) != entry[4]:
+        raise ValueError("Некорректный контейнер: блок не совпадает с контрольной суммой")
+    return block
+
+
+def read_container(source, destination, function, executor=None,
+                   max_in_flight: int = IN_FLIGHT_PER_WORKER) -> int:
+    """
+    Восстанавливает контейнер в destination; блоки восстанавливаются
+    function((сжатые данные, индекс BWT)) и пишутся по порядку.
+    Возвращает количество записанных байт.
+    """
+    _, entries = read_index(source)
+    written = 0
+    restored = map_ordered(function, read_block_payloads(source, entries), executor, max_in_flight)
+    for entry, block in zip(entries, restored):
+        destination.write(_check_block(block, entry))
+        written += len(block)
+    return written
+
+
+def read_container_range(path, start: int, length: int, function) -> bytes:
+    """
+    Возвращает length байт исходного файла начиная с позиции start,
+    восстанавливая только блоки, пересекающие этот диапазон.
+    """
+    if start < 0 or length < 0:
+        raise ValueError(f"Некорректный диапазон: start={start}, length={length}")
+    if length == 0:
+        return b""
+    with open(path, "rb") as source:
+        _, entries = read_index(source)
+        # За концом исходного файла блоков нет - ничего не восстанавливаем
+        total_size = entries[-1][1] + entries[-1][3] if entries else 0
+        if start >= total_size:
+            return b""
+        end = start + length
+        starts = [entry[1] for entry in entries]
+        first = max(bisect_right(starts, start) - 1, 0)
+        needed = [entry for entry in entries[first:] if entry[1] < end]
+        result = bytearray()
+        for entry, payload in zip(needed, read_block_payloads(source, needed)):
+            result.extend(_check_block(function(payload), entry))
+    offset = start - needed[0][1]
+    return bytes(result[offset:offset + length])
@@ -0,0 +1,76 @@
+import numpy as np
+
+# --- Преобразование Барроуза-Уилера через суффиксный массив ---
+#
+# Повороты блока сортируются удвоением префикса (prefix doubling): на шаге k
+# ранг поворота i - это пара (ранг i, ранг i + k) по модулю длины блока, пары
+# сортируются средствами NumPy. Повороты не материализуются, поэтому память
+# линейна по размеру блока, а блоки в сотни КБ и мегабайты обрабатываются за секунды.
+# Блок преобразуется целиком, для него хранится один номер исходной строки.
+
+
+def cyclic_suffix_array(data) -> np.ndarray:
+    """
+    Возвращает начала поворотов data в отсортированном порядке (int32).
+    Сравнение циклическое, поэтому символ-ограничитель не нужен.
+    """
+    symbols = data if isinstance(data, np.ndarray) else np.frombuffer(data, dtype=np.uint8)
+    n = len(symbols)
+    if n == 0:
+        return np.zeros(0, dtype=np.int32)
+
+    # Начальные ранги - по первым четырём байтам поворота
+    symbols = symbols.astype(np.int64)
+    key = symbols << 24
+    for shift in range(1, 4):
+        key |= np.roll(symbols, -shift) << (24 - 8 * shift)
+    _, rank = np.unique(key, return_inverse=True)
+    rank = rank.reshape(-1).astype(np.int64)
+    order = np.argsort(rank, kind='stable')
+
+    k = 4
+    while k < n and rank.max() < n - 1:
+        key = rank * n + np.roll(rank, -k)
+        order = np.argsort(key, kind='stable')
+        sorted_key = key[order]
+        rank[order] = np.concatenate([[0], np.cumsum(sorted_key[1:] != sorted_key[:-1])])
+        k *= 2
+    return order.astype(np.int32)
+
+
+def bwt_transform(block: bytes) -> tuple[bytes, int]:
+    """
+    Преобразует блок данных с помощью BWT.
+    Возвращает последний столбец и номер строки исходного блока.
+    """
+    if len(block) == 0:
+        return b"", 0
+    symbols = np.frombuffer(block, dtype=np.uint8)
+    order = cyclic_suffix_array(symbols)
+    # Последний символ поворота, начинающегося с i, - символ i - 1 (циклически)
+    transformed = symbols[order - 1].tobytes()
+    original_index = int(np.argmin(order))
+    return transformed, original_index
+
+
+def bwt_inverse(transformed_data: bytes, original_index: int) -> bytes:
+    """
+    Обратное преобразование BWT для одного блока за линейное время.
+    i-е вхождение символа c в последнем столбце стоит в первом столбце на позиции
+    starts[c] + i, поэтому массив переходов next - это устойчивая сортировка
+    подсчётом последнего столбца (для uint8 NumPy сортирует поразрядно).
+    Последовательно выполняется только проход по ссылкам.
+    """
+    n = len(transformed_data)
+    if n == 0:
+        return b""
+    last = np.frombuffer(transformed_data, dtype=np.uint8)
+    next_rows = np.argsort(last, kind='stable')
+
+    next_list = next_rows.tolist()
+    rows = [0] * n
+    row = original_index
+    for i in range(n):
+        row = next_list[row]
+        rows[i] = row
+    return last[np.array(rows, dtype=np.int64)].tobytes()
@@ -1,6 +1,12 @@
 import time
 import math
 import os
+import argparse
+from bwt import bwt_transform, bwt_inverse
+from huffman_codec import huffman_executor
+from block_container import (write_container, read_container, read_container_range,
+                             IN_FLIGHT_PER_WORKER)
+from rle_codec import rle_encode, rle_decode
 
 # Создаем директории, если они не существуют
 compressed_dir = "C:/Users/alexe/Desktop/uni/сем4/aicd1/compressed files/BWT+RLE"
@@ -9,187 +15,63 @@ decompressed_dir = "C:/Users/alexe/Desktop/uni/сем4/aicd1/decompressed files/
 os.makedirs(compressed_dir, exist_ok=True)
 os.makedirs(decompressed_dir, exist_ok=True)
 
-# Размер блока (64 КБ)
+# Размер блока (64 КБ) - BWT применяется к блоку целиком
 BLOCK_SIZE = 64 * 1024
 
-def bwt_transform(data: bytes, chunk_size: int = 1024) -> tuple[bytes, list[int]]:
-    """
-    Применяет преобразование Барроуза-Уилера к данным с разбиением на чанки.
-    """
-    transformed_data = bytearray()
-    indices = []
-    for start in range(0, len(data), chunk_size):
-        chunk = data[start:start + chunk_size]
-        index, encoded_chunk = transform_chunk(chunk)
-        transformed_data.extend(encoded_chunk)
-        indices.append(index)
-    return bytes(transformed_data), indices
-
-def transform_chunk(chunk: bytes) -> tuple[int, bytes]:
-    """
-    Преобразует один чанк данных с помощью BWT.
-    """
-    rotations = [chunk[i:] + chunk[:i] for i in range(len(chunk))]
-    rotations.sort()
-    original_index = rotations.index(chunk)
-    encoded_chunk = bytes(rotation[-1] for rotation in rotations)
-    return original_index, encoded_chunk
+# Формат сжатого файла - контейнер block_container (данные блока - поток
+# rle_codec.rle_encode последнего столбца BWT) с индексом блоков в конце
 
-def bwt_inverse(transformed_data: bytes, indices: list[int], chunk_size: int = 1024) -> bytes:
+def process_block(block: bytes) -> tuple[bytes, int]:
     """
-    Обратное преобразование Барроуза-Уилера с разбиением на чанки.
+    Обрабатывает блок данных: применяет BWT и RLE.
+    Возвращает сжатые данные и номер исходной строки BWT.
     """
-    restored_data = bytearray()
-    position = 0
-    index = 0
-    while position < len(transformed_data):
-        end = position + chunk_size if position + chunk_size <= len(transformed_data) else len(transformed_data)
-        chunk = transformed_data[position:end]
-        original_index = indices[index]
-        restored_chunk = reverse_transform_chunk(original_index, chunk)
-        restored_data.extend(restored_chunk)
-        position = end
-        index += 1
-    return bytes(restored_data)
-
-def reverse_transform_chunk(original_index: int, encoded_chunk: bytes) -> bytes:
+    transformed_data, index = bwt_transform(block)
+    compressed_data = rle_encode(transformed_data)
+    return compressed_data, index
+
+def restore_block(task: tuple) -> bytes:
     """
-    Обратное преобразование BWT для одного чанка.
+    Восстанавливает блок: обратный RLE и обратное BWT.
+    task - (сжатые данные, индекс BWT).
     """
-    table = [(char, idx) for idx, char in enumerate(encoded_chunk)]
-    table.sort()
-    result = bytearray()
-    current_row = original_index
-    for _ in range(len(encoded_chunk)):
-        char, current_row = table[current_row]
-        result.append(char)
-    return bytes(result)
-
-def rle_compress(data: bytes) -> bytes:
-    compressed = bytearray()
-    i = 0
-    n = len(data)
-    while i < n:
-        current = data[i]
-        count = 1
-        while i + count < n and count < 127 and data[i + count] == current:
-            count += 1
-        if count > 1:
-            compressed.append(0x80 | count)  # Бит 7 = 1 для повторов
-            compressed.append(current)
-            i += count
-        else:
-            # Собираем неповторяющуюся последовательность
-            seq = bytearray()
-            seq.append(current)
-            i += 1
-            while i < n and len(seq) < 127 and (i >= n-1 or data[i] != data[i+1]):
-                seq.append(data[i])
-                i += 1
-            compressed.append(len(seq))  # Бит 7 = 0
-            compressed.extend(seq)
-    return bytes(compressed)
-
-
-def rle_decompress(compressed_data: bytes) -> bytes:
-    decompressed = bytearray()
-    i = 0
-    n = len(compressed_data)
-    while i < n:
-        header = compressed_data[i]
-        i += 1
-
-        if header & 0x80:  # Если установлен бит 7 - это повтор
-            count = header & 0x7F  # Получаем длину (биты 0-6)
-            if i >= n:
-                raise ValueError("Invalid RLE data: missing byte after repeat header")
-            byte = compressed_data[i]
-            i += 1
-            decompressed.extend([byte] * count)
-        else:  # Это последовательность неповторяющихся символов
-            length = header
-            if i + length > n:
-                raise ValueError(f"Invalid RLE data: expected {length} bytes, got {n - i}")
-            decompressed.extend(compressed_data[i:i + length])
-            i += length
-    return bytes(decompressed)
-
-def process_block(block: bytes) -> tuple[bytes, list[int]]:
+    compressed_block, index = task
+    decompressed_transformed_data = rle_decode(compressed_block)
+    return bwt_inverse(decompressed_transformed_data, index)
+
+def read_range(path, start: int, length: int) -> bytes:
     """
-    Обрабатывает блок данных: применяет BWT и RLE.
-    Возвращает сжатые данные и индексы BWT.
+    Возвращает length байт исходного файла с позиции start,
+    восстанавливая только нужные блоки сжатого файла path.
     """
-    transformed_data, indices = bwt_transform(block)
-    compressed_data = rle_compress(transformed_data)
-    return compressed_data, indices
+    return read_container_range(path, start, length, restore_block)
 
-def process_file_in_blocks(file_path, output_compressed, output_decompressed):
+def process_file_in_blocks(file_path, output_compressed, output_decompressed, block_size=BLOCK_SIZE, workers=1):
     # Начало измерения времени
     start_time = time.time()
 
-    # Чтение исходных данных для вычисления энтропии
-    with open(file_path, "rb") as f:
-        data = f.read()
-    original_size = len(data)
+    original_size = os.path.getsize(file_path)
     print(f"Исходный размер данных: {original_size} байт")
 
     # Открываем файл для записи сжатых данных
-    with open(output_compressed, "wb") as compressed_file:
+    with open(output_compressed, "wb") as compressed_file, huffman_executor(workers) as executor:
         # Открываем файл для чтения и обработки блоков
         with open(file_path, "rb") as f:
-            block_number = 0
-            while True:
-                block = f.read(BLOCK_SIZE)
-                if not block:
-                    break
-                compressed_block, indices = process_block(block)
-                # Записываем номер блока, количество индексов, индексы BWT и сжатые данные
-                compressed_file.write(block_number.to_bytes(4, byteorder='big'))
-                compressed_file.write(len(indices).to_bytes(4, byteorder='big'))
-                for index in indices:
-                    compressed_file.write(index.to_bytes(4, byteorder='big'))
-                compressed_file.write(len(compressed_block).to_bytes(4, byteorder='big'))
-                compressed_file.write(compressed_block)
-                block_number += 1
+            # Блоки сжимаются в workers процессах и записываются по порядку,
+            # размер блока - в заголовке, индекс блоков - в конце файла
+            write_container(f, compressed_file, block_size, process_block, executor,
+                            workers * IN_FLIGHT_PER_WORKER)
 
     # Размер сжатых данных
     compressed_size = os.path.getsize(output_compressed)
     print(f"Размер сжатых данных: {compressed_size} байт")
 
     # Чтение сжатых данных и декомпрессия
-    with open(output_compressed, "rb") as f:
-        # Собираем блоки в словарь для восстановления порядка
-        blocks = {}
-        while True:
-            # Читаем номер блока
-            block_number_bytes = f.read(4)
-            if not block_number_bytes:
-                break
-            block_number = int.from_bytes(block_number_bytes, byteorder='big')
-            # Читаем количество индексов
-            num_indices_bytes = f.read(4)
-            num_indices = int.from_bytes(num_indices_bytes, byteorder='big')
-            # Читаем индексы BWT
-            indices = []
-            for _ in range(num_indices):
-                index_bytes = f.read(4)
-                indices.append(int.from_bytes(index_bytes, byteorder='big'))
-            # Читаем размер сжатого блока
-            block_size_bytes = f.read(4)
-            block_size = int.from_bytes(block_size_bytes, byteorder='big')
-            # Читаем сжатые данные
-            compressed_block = f.read(block_size)
-            # Декомпрессия RLE
-            decompressed_transformed_data = rle_decompress(compressed_block)
-            # Обратное преобразование BWT
-            decompressed_data = bwt_inverse(decompressed_transformed_data, indices)
-            # Сохраняем блок в словаре
-            blocks[block_number] = decompressed_data
-
-        # Записываем блоки в правильном порядке
-        with open(output_decompressed, "wb") as decompressed_file:
-            for block_number in sorted(blocks.keys()):
-                decompressed_file.write(blocks[block_number])
+    with open(output_compressed, "rb") as f, open(output_decompressed, "wb") as decompressed_file, \
+            huffman_executor(workers) as executor:
+        # Блоки (по индексу в конце файла) восстанавливаются в workers процессах
+        # и сразу пишутся по порядку; размер и CRC32 каждого блока сверяются с индексом
+        read_container(f, decompressed_file, restore_block, executor, workers * IN_FLIGHT_PER_WORKER)
 
     # Размер после декомпрессии
     decompressed_size = os.path.getsize(output_decompressed)
@@ -239,10 +121,15 @@ file_paths = [
             "binary_file.bin"
 ]
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="BWT + RLE")
+    parser.add_argument("files", nargs="*", default=file_paths, help="файлы для обработки")
+    parser.add_argument("--block-size", type=int, default=BLOCK_SIZE, help="размер блока BWT в байтах")
+    parser.add_argument("--workers", type=int, default=1, help="число процессов для сжатия блоков")
+    args = parser.parse_args()
     print("--- Запуск BWT+RLE ---")
 # Обработка каждого файла
-    for i, file_path in enumerate(file_paths):
+    for i, file_path in enumerate(args.files):
         output_compressed = f"{compressed_dir}/{file_path[:-4]}.bin"
         output_decompressed = f"{decompressed_dir}/{file_path[:-4]}.bin"
         print(f"Обработка файла {file_path}...")
-        process_file_in_blocks(file_path, output_compressed, output_decompressed)
\ No newline at end of file
+        process_file_in_blocks(file_path, output_compressed, output_decompressed, args.block_size, args.workers)
\ No newline at end of file
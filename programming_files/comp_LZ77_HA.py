@@ -1,8 +1,10 @@
 import numpy as np
-import queue
 import time
 import math
 import os
+from huffman_codec import huffman_executor, HUFFMAN_STREAMS
+from entropy_coders import entropy_compress, entropy_decompress, CODER_HUFFMAN
+from bitplane import bitplane_pack, bitplane_unpack
 
 # Создаем директории, если они не существуют
 compressed_dir = "C:/Users/alexe/Desktop/uni/сем4/aicd1/compressed files/LZ77+HA"
@@ -11,99 +13,6 @@ decompressed_dir = "C:/Users/alexe/Desktop/uni/сем4/aicd1/decompressed files/
 os.makedirs(compressed_dir, exist_ok=True)
 os.makedirs(decompressed_dir, exist_ok=True)
 
-# Класс для узла дерева Хаффмана
-class Node():
-    def __init__(self, symbol=None, counter=None, left=None, right=None, parent=None):
-        self.symbol = symbol
-        self.counter = counter
-        self.left = left
-        self.right = right
-        self.parent = parent
-
-    def __lt__(self, other):
-        return self.counter < other.counter
-
-
-# Функция для подсчета частоты символов
-def count_symb(data: bytes) -> np.ndarray:
-    counter = np.zeros(256, dtype=int)
-    for byte in data:
-        counter[byte] += 1
-    return counter
-
-
-# Функция для сжатия данных с помощью алгоритма Хаффмана
-def huffman_compress(data: bytes) -> bytes:
-    C = count_symb(data)
-    list_of_leafs = []
-    Q = queue.PriorityQueue()
-
-    for i in range(256):
-        if C[i] != 0:
-            leaf = Node(symbol=i, counter=C[i])
-            list_of_leafs.append(leaf)
-            Q.put(leaf)
-
-    while Q.qsize() >= 2:
-        left_node = Q.get()
-        right_node = Q.get()
-        parent_node = Node(left=left_node, right=right_node)
-        left_node.parent = parent_node
-        right_node.parent = parent_node
-        parent_node.counter = left_node.counter + right_node.counter
-        Q.put(parent_node)
-
-    codes = {}
-    for leaf in list_of_leafs:
-        node = leaf
-        code = ""
-        while node.parent is not None:
-            if node.parent.left == node:
-                code = "0" + code
-            else:
-                code = "1" + code
-            node = node.parent
-        codes[leaf.symbol] = code
-
-    coded_message = ""
-    for byte in data:
-        coded_message += codes[byte]
-
-    padding = 8 - len(coded_message) % 8
-    coded_message += '0' * padding
-    coded_message = f"{padding:08b}" + coded_message
-
-    bytes_string = bytearray()
-    for i in range(0, len(coded_message), 8):
-        byte = coded_message[i:i + 8]
-        bytes_string.append(int(byte, 2))
-
-    return bytes(bytes_string), codes
-
-
-# Функция для декомпрессии данных с помощью алгоритма Хаффмана
-def huffman_decompress(compressed_data: bytes, huffman_codes: dict) -> bytes:
-    padding = compressed_data[0]
-    coded_message = ""
-    for byte in compressed_data[1:]:
-        coded_message += f"{byte:08b}"
-
-    if padding > 0:
-        coded_message = coded_message[:-padding]
-
-    reverse_codes = {v: k for k, v in huffman_codes.items()}
-    current_code = ""
-    decoded_data = bytearray()
-
-    for bit in coded_message:
-        current_code += bit
-        if current_code in reverse_codes:
-            decoded_data.append(reverse_codes[current_code])
-            current_code = ""
-
-    return bytes(decoded_data)
-
-
 # Функция для кодирования данных с помощью алгоритма LZ77
 def lz77_encode(data: bytes, buffer_size: int) -> bytes:
     encoded_data = bytearray()
@@ -170,53 +79,19 @@ def lz77_decode(encoded_data: bytes) -> bytes:
     return bytes(decoded_data)
 
 
-# Функция для чтения кодов Хаффмана из файла
-def read_huffman_codes(codes_file):
-    huffman_codes = {}
-    with open(codes_file, 'r') as f:
-        for line in f:
-            symbol, code = line.strip().split(':')
-            huffman_codes[int(symbol)] = code
-    return huffman_codes
-
-
-# Функция для записи кодов Хаффмана в файл
-def write_huffman_codes(huffman_codes, file_path):
-    with open(file_path, 'w') as code_file:
-        for symbol, code in huffman_codes.items():
-            code_file.write(f"{symbol}:{code}\n")
-
-
-
-
-# Функция для вычисления средней длины кода Хаффмана
-def calculate_average_code_length(huffman_codes: dict, data: bytes) -> float:
-    counter = count_symb(data)
-    total_symbols = len(data)
-    total_length = 0.0
-
-    for symbol, code in huffman_codes.items():
-        probability = counter[symbol] / total_symbols
-        total_length += probability * len(code)
-
-    return total_length
-
-
 # Функция для сжатия данных с использованием LZ77 и Хаффмана
-def lz77_huffman_compress(data: bytes, buffer_size: int) -> bytes:
+def lz77_huffman_compress(data: bytes, buffer_size: int, streams: int = 1, coder: str = CODER_HUFFMAN) -> bytes:
     # Сжатие данных с помощью LZ77
     lz77_encoded_data = lz77_encode(data, buffer_size)
 
-    # Сжатие результата LZ77 с помощью Хаффмана
-    huffman_compressed_data, huffman_codes = huffman_compress(lz77_encoded_data)
-
-    return huffman_compressed_data, huffman_codes
+    # Сжатие результата LZ77 энтропийным кодером (по умолчанию Хаффман)
+    return entropy_compress(lz77_encoded_data, coder, streams)
 
 
 # Функция для декомпрессии данных с использованием LZ77 и Хаффмана
-def lz77_huffman_decompress(compressed_data: bytes, huffman_codes: dict) -> bytes:
-    # Декомпрессия Хаффмана
-    huffman_decompressed_data = huffman_decompress(compressed_data, huffman_codes)
+def lz77_huffman_decompress(compressed_data: bytes, executor=None) -> bytes:
+    # Декомпрессия Хаффмана (подпотоки - через executor, если он передан)
+    huffman_decompressed_data = entropy_decompress(compressed_data, executor)
 
     # Декомпрессия LZ77
     lz77_decoded_data = lz77_decode(huffman_decompressed_data)
@@ -225,30 +100,33 @@ def lz77_huffman_decompress(compressed_data: bytes, huffman_codes: dict) -> byte
 
 
 # Функция для обработки файла с использованием LZ77 и Хаффмана
-def process_file_with_lz77_huffman(file_path, output_compressed, output_decompressed, buffer_size=1024):
+def process_file_with_lz77_huffman(file_path, output_compressed, output_decompressed, buffer_size=1024,
+                                   streams=HUFFMAN_STREAMS, workers=1, coder=CODER_HUFFMAN, bitplanes=False):
     start_time = time.time()
 
     # Чтение исходных данных
     with open(file_path, "rb") as f:
         data = f.read()
 
+    # bitplanes=True - упаковка малого алфавита по битовым плоскостям перед сжатием
+    if bitplanes:
+        data = bitplane_pack(data)
+
     # Сжатие данных с использованием LZ77 и Хаффмана
-    compressed_bytes, huffman_codes = lz77_huffman_compress(data, buffer_size)
+    compressed_bytes = lz77_huffman_compress(data, buffer_size, streams, coder)
 
-    # Запись сжатых данных и кодов Хаффмана
+    # Запись сжатых данных (длины кодов Хаффмана хранятся в заголовке потока)
     with open(output_compressed, "wb") as file:
         file.write(compressed_bytes)
 
-    with open(output_compressed + '_codes', 'w') as code_file:
-        for symbol, code in huffman_codes.items():
-            code_file.write(f"{symbol}:{code}\n")
-
     # Чтение сжатых данных и декомпрессия
     with open(output_compressed, "rb") as f:
         compressed_data = f.read()
 
-    huffman_codes = read_huffman_codes(output_compressed + '_codes')
-    decompressed_data = lz77_huffman_decompress(compressed_data, huffman_codes)
+    with huffman_executor(workers) as executor:
+        decompressed_data = lz77_huffman_decompress(compressed_data, executor)
+    if bitplanes:
+        decompressed_data = bitplane_unpack(decompressed_data)
     
     # Добавляем запись декомпрессированных данных
     with open(output_decompressed, "wb") as f:
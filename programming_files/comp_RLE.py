@@ -3,36 +3,12 @@ import time
 import math
 import os
 import sys
+from rle_codec import (rle_encode, rle_decode, rle_compress_stream, rle_decompress_stream, RLE_FORMAT_VARINT,
+                       RLE_STREAM_CHUNK_SIZE)
+from bitplane import bitplane_pack, bitplane_unpack
+from comp_HA import check_files_match
 # --- Вспомогательные функции ---
 
-def count_symb(data: bytes) -> np.ndarray:
-    """
-    Подсчитывает частоту символов в данных.
-    """
-    counter = np.zeros(256, dtype=int)
-    for byte in data:
-        counter[byte] += 1
-    return counter
-
-def calculate_entropy(data: bytes) -> float:
-    """
-    Вычисляет энтропию данных по формуле Шеннона.
-    """
-    if not data: # Обработка пустого ввода
-        return 0.0
-    counter = count_symb(data)
-    total_symbols = len(data)
-    entropy = 0.0
-
-    for count in counter:
-        if count > 0:
-            probability = count / total_symbols
-            # Избегаем log2(0) - это не должно происходить при count > 0, но для надежности
-            if probability > 0:
-                entropy -= probability * math.log2(probability)
-
-    return entropy
-
 def calculate_average_code_length(data: bytes, compressed_data: bytes) -> float:
     """
     Вычисляет среднюю длину кода.
@@ -44,163 +20,31 @@ def calculate_average_code_length(data: bytes, compressed_data: bytes) -> float:
     # Средняя длина кода в битах на ИСХОДНЫЙ символ
     return (total_compressed_bytes * 8) / total_symbols
 
-# --- PackBits RLE Реализация ---
-
-def packbits_rle_compress(data: bytes) -> bytes:
-    """
-    Сжимает данные с использованием PackBits-подобного RLE.
-    Управляющий байт N:
-    - 0 <= N <= 127: Следующие N+1 байт - литералы (копируются как есть).
-    - 129 <= N <= 255: Следующий байт повторить 258-N раз (для длин от 3 до 128).
-    - N = 128: Зарезервировано (здесь игнорируется/не используется при кодировании).
-    """
-    compressed_data = bytearray()
-    n = len(data)
-    i = 0
-    MAX_LEN = 128 # Макс. длина для одного блока литералов (N+1) или повторов (258-N -> до 128 раз)
-
-    while i < n:
-        # Вывод прогресса для долгих операций
-
-
-        # 1. Ищем последовательность повторов
-        repeat_count = 1
-        # Ищем повторы (нужно хотя бы 3 для кодирования как повтор)
-        # Ограничиваем максимальную длину повтора значением MAX_LEN (128)
-        while (i + repeat_count < n and
-               data[i + repeat_count] == data[i] and
-               repeat_count < MAX_LEN):
-            repeat_count += 1
-
-        # ИЗМЕНЕНИЕ ЗДЕСЬ: Кодируем как повтор только если длина 3 или больше
-        if repeat_count >= 3:
-            # Нашли повтор. Кодируем его.
-            # Управляющий байт: 258 - repeat_count (будет в диапазоне [130, 255])
-            control_byte = 258 - repeat_count
-            compressed_data.append(control_byte)
-            compressed_data.append(data[i]) # Байт для повторения
-            i += repeat_count # Продвигаем индекс
-
-        else:
-            # 2. Не нашли повтор >= 3, значит ищем последовательность литералов
-            literal_start = i
-            # Ищем конец последовательности литералов. Останавливаемся, если:
-            # - Достигли конца данных
-            # - Нашли 3 одинаковых байта подряд (это будет начало следующего повтора) - ИЗМЕНЕНО УСЛОВИЕ
-            # - Достигли максимальной длины для литералов (MAX_LEN)
-            i += 1 # Начинаем проверку со следующего байта
-            while i < n:
-                 # Проверяем, не превысили ли максимальную длину литералов
-                 if i - literal_start >= MAX_LEN:
-                      break
-
-                 # Проверяем, не начинается ли последовательность повторов из 3х символов
-                 if (i + 1 < n and data[i] == data[i+1] and # Нашли два подряд
-                     i > literal_start and data[i] == data[i-1]): # и предыдущий такой же (т.е. три подряд)
-                      # Нашли начало повтора из 3х, останавливаем литералы ПЕРЕД ним
-                      i -= 1 # Возвращаемся на один символ назад, чтобы он не попал в литералы
-                      break
-
-                 # Если дошли до конца файла, текущий символ - последний литерал
-                 if i == n - 1:
-                      i += 1 # Продвигаем i за конец, чтобы включить последний символ
-                      break
-
-                 # Если просто два одинаковых подряд (AA) - это еще не повод останавливать литералы
-                 # (так как мы кодируем повторы только от 3х)
-                 # if i + 1 < n and data[i] == data[i+1]:
-                 #      pass # Просто продолжаем, AA пойдут как литералы
-
-                 # Если текущий и следующий разные - продолжаем литералы
-                 if i + 1 < n and data[i] != data[i+1]:
-                      i += 1
-                      continue
-
-                 # Если i+1 >= n (конец файла) - выходим из внутреннего while после этой итерации
-                 # но нужно убедиться что i увеличился
-
-                 # Попали сюда, если i+1 < n и data[i] == data[i+1].
-                 # Мы не вышли по условию "3 подряд", значит это только 2 подряд.
-                 # Продолжаем искать литералы, включая эту пару.
-                 i += 1
-
-
-            # Определяем длину найденной последовательности литералов
-            literal_len = i - literal_start
-
-            if literal_len > 0:
-                # Кодируем литералы.
-                # Управляющий байт: literal_len - 1 (будет в диапазоне [0, 127])
-                control_byte = literal_len - 1
-                compressed_data.append(control_byte)
-                compressed_data.extend(data[literal_start : i]) # Добавляем сами литералы
-            # i уже указывает на байт после литералов (или на конец данных)
-
-    # print() # Убрал дублирующуюся новую строку
-    return bytes(compressed_data)
-
-def packbits_rle_decompress(compressed_data: bytes) -> bytes:
-    """
-    Декомпрессия данных, сжатых PackBits-подобным RLE.
-    """
-    decompressed_data = bytearray()
-    n = len(compressed_data)
-    i = 0
-
-    while i < n:
-
-        control_byte = compressed_data[i]
-        i += 1
-
-        if control_byte <= 127:
-            # Литералы: control_byte = N, длина = N + 1
-            length = control_byte + 1
-            if i + length > n:
-                 raise ValueError(f"Ошибка данных: недостаточно байт для литеральной последовательности. Индекс: {i}, нужно: {length}, доступно: {n-i}")
-            decompressed_data.extend(compressed_data[i : i + length])
-            i += length
-        elif control_byte >= 129:
-            # Повторы: control_byte = N, длина = 258 - N
-            count = 258 - control_byte # count будет от 3 до 129
-            if i >= n:
-                 raise ValueError(f"Ошибка данных: отсутствует байт значения для повторяющейся последовательности. Индекс: {i}")
-            byte_to_repeat = compressed_data[i]
-            decompressed_data.extend([byte_to_repeat] * count)
-            i += 1
-        else: # control_byte == 128
-             # В стандарте PackBits байт 128 ('80' hex) игнорируется (No-Op)
-             # print(f"Decompress No-Op: control={control_byte}, next_byte_idx={i}")
-             pass
-
-    sys.stdout.flush()
-    print() # Новая строка после прогресс-бара
-    return bytes(decompressed_data)
-
 # --- Функция обработки файла ---
 
-def process_file_nontext_1(file_path, output_compressed, output_decompressed):
-    # Начало измерения времени
-    start_time = time.time()
-
+def _process_file_in_memory(file_path, output_compressed, output_decompressed, bitplanes, rle_format) -> bool:
+    """Сжатие и распаковка файла целиком в памяти. Возвращает False при ошибке."""
     # Чтение исходных данных
     try:
         with open(file_path, "rb") as f:
             data = f.read()
     except FileNotFoundError:
         print(f"Ошибка: Файл не найден - {file_path}\n")
-        return
+        return False
     except Exception as e:
         print(f"Ошибка чтения файла {file_path}: {e}\n")
-        return
+        return False
 
 
 
-    # Сжатие данных
+    # Сжатие данных (bitplanes=True - сначала упаковка малого алфавита по битовым плоскостям)
     try:
-        compressed_bytes = packbits_rle_compress(data)
+        if bitplanes:
+            data = bitplane_pack(data)
+        compressed_bytes = rle_encode(data, rle_format)
     except Exception as e:
         print(f"Ошибка во время сжатия файла {file_path}: {e}")
-        return # Прерываем обработку этого файла
+        return False # Прерываем обработку этого файла
 
     # Создание директорий, если их нет
     try:
@@ -208,7 +52,7 @@ def process_file_nontext_1(file_path, output_compressed, output_decompressed):
         os.makedirs(os.path.dirname(output_decompressed), exist_ok=True)
     except Exception as e:
          print(f"Ошибка создания директорий: {e}")
-         return # Не можем продолжать без директорий
+         return False # Не можем продолжать без директорий
 
     # Запись сжатых данных
     try:
@@ -216,7 +60,7 @@ def process_file_nontext_1(file_path, output_compressed, output_decompressed):
             file.write(compressed_bytes)
     except Exception as e:
         print(f"Ошибка записи сжатого файла {output_compressed}: {e}")
-        return
+        return False
 
     # Чтение сжатых данных и декомпрессия
     try:
@@ -224,11 +68,13 @@ def process_file_nontext_1(file_path, output_compressed, output_decompressed):
             compressed_data_read = f.read()
     except Exception as e:
         print(f"Ошибка чтения сжатого файла {output_compressed}: {e}")
-        return
+        return False
 
     decompressed_data = b"" # Инициализация на случай ошибки
     try:
-        decompressed_data = packbits_rle_decompress(compressed_data_read)
+        decompressed_data = rle_decode(compressed_data_read)
+        if bitplanes:
+            decompressed_data = bitplane_unpack(decompressed_data)
     except ValueError as e:
         print(f"Ошибка декомпрессии файла {output_compressed}: {e}")
         # Записываем пустой файл или маркер ошибки
@@ -254,10 +100,57 @@ def process_file_nontext_1(file_path, output_compressed, output_decompressed):
     except Exception as e:
         print(f"Ошибка записи декомпрессированного файла {output_decompressed}: {e}")
         # Статистику все равно выведем
+    return True
+
+
+def _process_file_streaming(file_path, output_compressed, output_decompressed, chunk_size) -> bool:
+    """
+    Потоковое сжатие и распаковка (формат varint): файлы читаются порциями
+    по chunk_size байт, память не зависит от размера файла. Возвращает False при ошибке.
+    """
+    try:
+        os.makedirs(os.path.dirname(output_compressed), exist_ok=True)
+        os.makedirs(os.path.dirname(output_decompressed), exist_ok=True)
+    except Exception as e:
+         print(f"Ошибка создания директорий: {e}")
+         return False # Не можем продолжать без директорий
+
+    try:
+        with open(file_path, "rb") as source, open(output_compressed, "wb") as destination:
+            rle_compress_stream(source, destination, chunk_size)
+    except FileNotFoundError:
+        print(f"Ошибка: Файл не найден - {file_path}\n")
+        return False
+    except Exception as e:
+        print(f"Ошибка во время сжатия файла {file_path}: {e}")
+        return False
+
+    # При ошибке декомпрессии в файле остаётся то, что успели восстановить, - проверка данных не пройдет
+    try:
+        with open(output_compressed, "rb") as source, open(output_decompressed, "wb") as destination:
+            rle_decompress_stream(source, destination, chunk_size)
+    except ValueError as e:
+        print(f"Ошибка декомпрессии файла {output_compressed}: {e}")
+    except Exception as e:
+        print(f"Неожиданная ошибка во время декомпрессии {output_compressed}: {e}")
+    return True
 
 
+def process_file_nontext_1(file_path, output_compressed, output_decompressed, bitplanes=False,
+                           rle_format=RLE_FORMAT_VARINT, chunk_size=RLE_STREAM_CHUNK_SIZE):
+    # Начало измерения времени
+    start_time = time.time()
+
+    # Формат varint сжимается потоково; упаковке по битовым плоскостям
+    # и форматам PackBits/0x80 нужен весь файл в памяти
+    if rle_format == RLE_FORMAT_VARINT and not bitplanes:
+        processed = _process_file_streaming(file_path, output_compressed, output_decompressed, chunk_size)
+    else:
+        processed = _process_file_in_memory(file_path, output_compressed, output_decompressed, bitplanes,
+                                            rle_format)
+    if not processed:
+        return
 
-  
     print("\n--- Результаты сжатия ---")
     end_time = time.time()
     original_size = os.path.getsize(file_path)
@@ -283,13 +176,6 @@ def format_size(size_in_bytes):
     else:
         return f"{size_in_bytes:,} байт"
 
-def check_files_match(file1, file2):
-    """Проверяет, совпадают ли два файла"""
-    with open(file1, 'rb') as f1, open(file2, 'rb') as f2:
-        return f1.read() == f2.read()
-
-
-
 # --- Основной блок выполнения ---
 
 
@@ -0,0 +1,77 @@
+import numpy as np
+from huffman_codec import (huffman_compress_symbols, huffman_decompress_symbols, huffman_compress_tables,
+                           huffman_decompress_tables)
+from range_coder import range_compress_symbols, range_decompress_symbols
+from tans_codec import tans_compress_symbols, tans_decompress_symbols
+
+# --- Выбор энтропийного кодера для конвейеров "+HA" ---
+#
+# Сжатый поток начинается с одного байта - номера кодера, дальше идёт поток
+# выбранного кодера, поэтому декодеру не нужно знать, чем сжимали.
+# Кроме байт кодеры принимают символы алфавита другого размера
+# (entropy_compress_symbols), размер алфавита декодеру передаётся явно.
+
+CODER_HUFFMAN = 'huffman'
+CODER_RANGE = 'range'
+CODER_TANS = 'tans'
+# Хаффман с несколькими таблицами и селекторами групп (как в bzip2)
+CODER_HUFFMAN_TABLES = 'huffman_tables'
+ALPHABET_SIZE = 256
+
+# имя -> (номер в потоке, сжатие(symbols, alphabet_size, streams),
+#         распаковка(data, alphabet_size, executor))
+ENTROPY_CODERS = {
+    CODER_HUFFMAN: (0, huffman_compress_symbols, huffman_decompress_symbols),
+    CODER_RANGE: (1, lambda symbols, alphabet_size, streams: range_compress_symbols(symbols, alphabet_size),
+                  lambda data, alphabet_size, executor: range_decompress_symbols(data, alphabet_size)),
+    CODER_TANS: (2, lambda symbols, alphabet_size, streams: tans_compress_symbols(symbols, alphabet_size),
+                 lambda data, alphabet_size, executor: tans_decompress_symbols(data, alphabet_size)),
+    CODER_HUFFMAN_TABLES: (3, lambda symbols, alphabet_size, streams: huffman_compress_tables(symbols, alphabet_size),
+                           lambda data, alphabet_size, executor: huffman_decompress_tables(data, alphabet_size)),
+}
+
+
+def entropy_compress(data: bytes, coder: str = CODER_HUFFMAN, streams: int = 1) -> bytes:
+    """
+    Сжимает данные выбранным энтропийным кодером. streams учитывается только
+    кодерами, которые поддерживают подпотоки (Хаффман).
+    """
+    return entropy_compress_symbols(np.frombuffer(data, dtype=np.uint8), ALPHABET_SIZE, coder, streams)
+
+
+def entropy_decompress(compressed_data: bytes, executor=None) -> bytes:
+    """
+    Восстанавливает данные, сжатые entropy_compress.
+    """
+    return entropy_decompress_symbols(compressed_data, ALPHABET_SIZE, executor).astype(np.uint8).tobytes()
+
+
+def entropy_compress_symbols(symbols: np.ndarray, alphabet_size: int, coder: str = CODER_HUFFMAN,
+                             streams: int = 1) -> bytes:
+    """
+    Сжимает массив символов алфавита из alphabet_size символов.
+    """
+    if coder not in ENTROPY_CODERS:
+        raise ValueError(f"Неизвестный энтропийный кодер: {coder}")
+    coder_id, compress, _ = ENTROPY_CODERS[coder]
+    if coder != CODER_HUFFMAN_TABLES:
+        return bytes([coder_id]) + compress(symbols, alphabet_size, streams)
+
+    # Подпотоки есть только у Хаффмана с одной таблицей, а на малых блоках заголовки
+    # нескольких таблиц дороже выигрыша от них: пишется более короткий из двух потоков
+    single_id, single_compress, _ = ENTROPY_CODERS[CODER_HUFFMAN]
+    single = bytes([single_id]) + single_compress(symbols, alphabet_size, streams)
+    if streams > 1:
+        return single
+    multi = bytes([coder_id]) + compress(symbols, alphabet_size, streams)
+    return single if len(single) <= len(multi) else multi
+
+
+def entropy_decompress_symbols(compressed_data: bytes, alphabet_size: int, executor=None) -> np.ndarray:
+    """
+    Восстанавливает массив символов, сжатый entropy_compress_symbols.
+    """
+    for coder_id, _, decompress in ENTROPY_CODERS.values():
+        if coder_id == compressed_data[0]:
+            return decompress(compressed_data[1:], alphabet_size, executor)
+    raise ValueError(f"Неизвестный номер энтропийного кодера: {compressed_data[0]}")
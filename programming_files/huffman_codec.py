@@ -0,0 +1,821 @@
+import heapq
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from stats import count_symb
+
+# --- Канонический код Хаффмана ---
+#
+# Формат сжатого потока:
+#   128 байт  - длины кодов 256 символов, по 4 бита на символ (0 - символ не встречается)
+#   4 байта   - количество закодированных символов (big-endian)
+#   1 байт    - число бит выравнивания в конце (как и раньше, от 1 до 8)
+#   далее     - биты кодов
+# Многопоточный вариант (streams > 1) вместо байта выравнивания содержит:
+#   1 байт    - 0 (признак подпотоков)
+#   1 байт    - количество подпотоков N
+#   4*N байт  - размеры подпотоков; далее сами подпотоки, каждый дополнен до байта
+# Сами коды не хранятся: канонический код однозначно восстанавливается по длинам.
+# Для алфавита другого размера (huffman_compress_symbols) заголовок длин
+# занимает (alphabet_size + 1) // 2 байт, остальное без изменений.
+
+ALPHABET_SIZE = 256
+MAX_CODE_LENGTH = 15  # Ограничение, чтобы длина помещалась в 4 бита
+LENGTHS_HEADER_SIZE = ALPHABET_SIZE // 2
+HEADER_SIZE = LENGTHS_HEADER_SIZE + 4 + 1
+
+# Табличное декодирование: окно в 16 бит, первый уровень по 10 битам
+WINDOW_BITS = 16
+PEEK_BITS = 10
+DECODE_CHUNK_BYTES = 64 * 1024
+ENCODE_CHUNK_SYMBOLS = 1 << 20
+
+# Размер блока потокового режима
+STREAM_BLOCK_SIZE = 1024 * 1024
+MAX_STREAMS = 255
+# Количество подпотоков, которое используют конвейеры сжатия по умолчанию
+HUFFMAN_STREAMS = 4
+
+
+def huffman_code_lengths(counter) -> np.ndarray:
+    """
+    Классический (неограниченный) код Хаффмана на массивах: узлы - индексы,
+    очередь - heapq из пар (частота, узел), у каждого узла хранится только родитель.
+    """
+    counter = np.asarray(counter, dtype=np.int64)
+    lengths = np.zeros(len(counter), dtype=np.uint8)
+    symbols = np.flatnonzero(counter).tolist()
+    if len(symbols) == 1:
+        # Единственному символу всё равно нужен хотя бы один бит
+        lengths[symbols[0]] = 1
+        return lengths
+
+    parent = [-1] * len(symbols)
+    heap = [(int(counter[s]), node) for node, s in enumerate(symbols)]
+    heapq.heapify(heap)
+    while len(heap) >= 2:
+        left_count, left_node = heapq.heappop(heap)
+        right_count, right_node = heapq.heappop(heap)
+        node = len(parent)
+        parent.append(-1)
+        parent[left_node] = node
+        parent[right_node] = node
+        heapq.heappush(heap, (left_count + right_count, node))
+
+    # Родитель создаётся позже детей, поэтому глубины считаются одним проходом от корня
+    depth = [0] * len(parent)
+    for node in range(len(parent) - 2, -1, -1):
+        depth[node] = depth[parent[node]] + 1
+    for node, s in enumerate(symbols):
+        lengths[s] = depth[node]
+    return lengths
+
+
+def package_merge_lengths(counter, max_length: int = MAX_CODE_LENGTH) -> np.ndarray:
+    """
+    Оптимальные длины кодов, не превышающие max_length (алгоритм package-merge).
+    Работает на отсортированных частотах: на каждом уровне соседние элементы
+    списка объединяются в пакеты и сливаются с листьями; длина кода символа равна
+    числу выбранных элементов-листьев этого символа среди первых 2n-2 элементов.
+    """
+    counter = np.asarray(counter, dtype=np.int64)
+    lengths = np.zeros(len(counter), dtype=np.uint8)
+    symbols = np.flatnonzero(counter)
+    n = len(symbols)
+    if n <= 1:
+        lengths[symbols] = 1
+        return lengths
+    if n > (1 << max_length):
+        raise ValueError(f"{n} символов не помещаются в коды длиной до {max_length} бит")
+
+    symbols = symbols[np.argsort(counter[symbols], kind='stable')]
+    leaf_weights = counter[symbols].tolist()
+    leaves = [(weight, 0, i) for i, weight in enumerate(leaf_weights)]
+
+    # levels[j] - список элементов (вес, 0 - лист / 1 - пакет, индекс) уровня j
+    levels = [leaves]
+    for _ in range(max_length - 1):
+        previous = levels[-1]
+        packages = [(previous[k][0] + previous[k + 1][0], 1, k // 2)
+                    for k in range(0, len(previous) - 1, 2)]
+        levels.append(sorted(leaves + packages))
+
+    # Обратный проход: выбранный пакет выбирает два элемента предыдущего уровня
+    selected = 2 * n - 2
+    leaf_counts = np.zeros(n, dtype=np.int64)
+    for level in reversed(levels):
+        items = level[:selected]
+        leaf_indices = [index for _, kind, index in items if kind == 0]
+        leaf_counts[leaf_indices] += 1
+        selected = 2 * (len(items) - len(leaf_indices))
+
+    lengths[symbols] = leaf_counts
+    return lengths
+
+
+def build_code_lengths(counter, max_length: int = MAX_CODE_LENGTH) -> np.ndarray:
+    """
+    Вычисляет длины кодов Хаффмана по частотам символов, не длиннее max_length,
+    чтобы табличный декодер мог рассчитывать на ограниченную длину кода.
+    Обычно хватает классического кода; если он слишком глубокий - package-merge.
+    """
+    lengths = huffman_code_lengths(counter)
+    if lengths.max(initial=0) <= max_length:
+        return lengths
+    return package_merge_lengths(counter, max_length)
+
+
+def canonical_codes(lengths) -> np.ndarray:
+    """
+    Назначает канонические коды по длинам: символы упорядочены по (длина, символ),
+    каждый следующий код на единицу больше предыдущего (со сдвигом при росте длины).
+    """
+    codes = np.zeros(len(lengths), dtype=np.uint32)
+    code = 0
+    previous_length = 0
+    for symbol in sorted((s for s in range(len(lengths)) if lengths[s] > 0),
+                         key=lambda s: (lengths[s], s)):
+        code <<= int(lengths[symbol]) - previous_length
+        previous_length = int(lengths[symbol])
+        codes[symbol] = code
+        code += 1
+    return codes
+
+
+def pack_code_lengths(lengths) -> bytes:
+    """Упаковывает длины кодов по 4 бита (256 длин - в 128 байт)."""
+    lengths = np.asarray(lengths, dtype=np.uint8)
+    if len(lengths) % 2:
+        lengths = np.append(lengths, 0).astype(np.uint8)
+    return ((lengths[0::2] << 4) | lengths[1::2]).astype(np.uint8).tobytes()
+
+
+def unpack_code_lengths(header: bytes, alphabet_size: int = ALPHABET_SIZE) -> np.ndarray:
+    """Распаковывает длины кодов из заголовка ((alphabet_size + 1) // 2 байт)."""
+    packed = np.frombuffer(header[:(alphabet_size + 1) // 2], dtype=np.uint8)
+    lengths = np.empty(len(packed) * 2, dtype=np.uint8)
+    lengths[0::2] = packed >> 4
+    lengths[1::2] = packed & 0x0F
+    return lengths[:alphabet_size]
+
+
+def read_code_lengths(compressed_data: bytes) -> np.ndarray:
+    """Возвращает длины кодов из заголовка сжатого потока."""
+    return unpack_code_lengths(compressed_data)
+
+
+def pack_codes(symbols: np.ndarray, codes: np.ndarray, lengths: np.ndarray, total_bytes: int) -> np.ndarray:
+    """
+    Записывает коды символов подряд в буфер из total_bytes байт (старший бит первым).
+    Битовые смещения кодов считаются накопленной суммой длин. Код длиной до 15 бит
+    со сдвигом до 7 бит укладывается в 24-битное значение, поэтому каждый символ
+    затрагивает не больше трёх байт; вклады в байты собираются через np.bincount
+    (биты разных кодов не пересекаются, поэтому сложение равносильно OR).
+    """
+    output = np.zeros(total_bytes + 3, dtype=np.int64)
+    bit_offset = 0
+    for start in range(0, len(symbols), ENCODE_CHUNK_SYMBOLS):
+        chunk = symbols[start:start + ENCODE_CHUNK_SYMBOLS]
+        chunk_lengths = lengths[chunk].astype(np.int64)
+        chunk_codes = codes[chunk].astype(np.int64)
+
+        ends = np.cumsum(chunk_lengths) + bit_offset
+        starts = ends - chunk_lengths
+        byte_index = starts >> 3
+        values = chunk_codes << (24 - (starts & 7) - chunk_lengths)
+
+        first_byte = int(byte_index[0])
+        byte_index -= first_byte
+        size = int(byte_index[-1]) + 3
+        output[first_byte:first_byte + size] += (
+            np.bincount(byte_index, weights=values >> 16, minlength=size)
+            + np.bincount(byte_index + 1, weights=(values >> 8) & 0xFF, minlength=size)
+            + np.bincount(byte_index + 2, weights=values & 0xFF, minlength=size)
+        ).astype(np.int64)
+        bit_offset = int(ends[-1])
+
+    return output[:total_bytes].astype(np.uint8)
+
+
+def huffman_compress(data: bytes, streams: int = 1) -> bytes:
+    """
+    Сжимает данные каноническим кодом Хаффмана. При streams > 1 символ i попадает
+    в подпоток i % streams; подпотоки кодируются одной таблицей и могут
+    декодироваться независимо (параллельно).
+    """
+    return huffman_compress_symbols(np.frombuffer(data, dtype=np.uint8), ALPHABET_SIZE, streams)
+
+
+def huffman_compress_symbols(symbols: np.ndarray, alphabet_size: int, streams: int = 1) -> bytes:
+    """
+    То же, что huffman_compress, для массива символов алфавита из alphabet_size
+    символов (например, 258 символов после кодирования серий нулей).
+    """
+    counter = count_symb(symbols, alphabet_size)
+    lengths = build_code_lengths(counter)
+    codes = canonical_codes(lengths)
+    header = pack_code_lengths(lengths) + len(symbols).to_bytes(4, 'big')
+
+    if streams == 1:
+        # Длина потока известна заранее из гистограммы
+        total_bits = int(np.dot(counter, lengths.astype(np.int64)))
+        padding = 8 - total_bits % 8
+        payload = pack_codes(symbols, codes, lengths, (total_bits + padding) // 8)
+        return header + bytes([padding]) + payload.tobytes()
+
+    if not 1 < streams <= MAX_STREAMS:
+        raise ValueError(f"Количество подпотоков должно быть от 1 до {MAX_STREAMS}")
+    payloads = []
+    for k in range(streams):
+        substream = symbols[k::streams]
+        total_bits = int(np.dot(count_symb(substream, alphabet_size), lengths.astype(np.int64)))
+        payloads.append(pack_codes(substream, codes, lengths, (total_bits + 7) // 8).tobytes())
+    sizes = b"".join(len(payload).to_bytes(4, 'big') for payload in payloads)
+    return header + bytes([0, streams]) + sizes + b"".join(payloads)
+
+
+def build_decode_tables(lengths) -> tuple:
+    """
+    Строит двухуровневые таблицы декодирования канонического кода.
+    Первый уровень индексируется первыми PEEK_BITS битами окна: для коротких кодов
+    запись сразу даёт символ и длину, для длинных - смещение подтаблицы, которая
+    индексируется следующими (max_length - PEEK_BITS) битами.
+    Неиспользуемые записи имеют длину 0.
+    """
+    codes = canonical_codes(lengths)
+    max_length = max(int(lengths.max(initial=0)), 1)
+    sub_bits = max(max_length - PEEK_BITS, 0)
+    symbol_type = np.uint8 if len(lengths) <= 256 else np.uint16
+
+    first_symbols = np.zeros(1 << PEEK_BITS, dtype=symbol_type)
+    first_lengths = np.zeros(1 << PEEK_BITS, dtype=np.int64)
+    first_links = np.full(1 << PEEK_BITS, -1, dtype=np.int64)
+    sub_symbols = []
+    sub_lengths = []
+
+    for symbol in range(len(lengths)):
+        length = int(lengths[symbol])
+        if length == 0:
+            continue
+        code = int(codes[symbol])
+        if length <= PEEK_BITS:
+            start = code << (PEEK_BITS - length)
+            end = (code + 1) << (PEEK_BITS - length)
+            first_symbols[start:end] = symbol
+            first_lengths[start:end] = length
+        else:
+            prefix = code >> (length - PEEK_BITS)
+            if first_links[prefix] < 0:
+                first_links[prefix] = len(sub_symbols)
+                sub_symbols.extend([0] * (1 << sub_bits))
+                sub_lengths.extend([0] * (1 << sub_bits))
+            rest_bits = length - PEEK_BITS
+            rest = code & ((1 << rest_bits) - 1)
+            start = int(first_links[prefix]) + (rest << (sub_bits - rest_bits))
+            for i in range(start, start + (1 << (sub_bits - rest_bits))):
+                sub_symbols[i] = symbol
+                sub_lengths[i] = length
+
+    return (first_symbols, first_lengths, first_links,
+            np.array(sub_symbols, dtype=symbol_type), np.array(sub_lengths, dtype=np.int64), sub_bits)
+
+
+def _bit_windows(payload: np.ndarray, start_byte: int, chunk_bytes: int) -> np.ndarray:
+    """
+    Возвращает WINDOW_BITS бит потока, начиная с каждой битовой позиции чанка.
+    Окно берётся из трёх соседних байт; за концом потока читаются нули.
+    """
+    window_bytes = payload[start_byte:start_byte + chunk_bytes + 2].astype(np.uint32)
+    window_bytes = np.concatenate([window_bytes,
+                                   np.zeros(chunk_bytes + 2 - len(window_bytes), dtype=np.uint32)])
+    w24 = (window_bytes[:-2] << 16) | (window_bytes[1:-1] << 8) | window_bytes[2:]
+    shifts = np.arange(8, 0, -1, dtype=np.uint32)
+    return ((w24[:, None] >> shifts) & ((1 << WINDOW_BITS) - 1)).ravel()
+
+
+def _lookup_chunk(payload: np.ndarray, start_byte: int, chunk_bytes: int, tables) -> tuple:
+    """
+    Для каждой битовой позиции чанка находит символ и длину кода, начинающегося в ней.
+    Окно в WINDOW_BITS бит берётся из трёх соседних байт (коды не длиннее 15 бит).
+    """
+    first_symbols, first_lengths, first_links, sub_symbols, sub_lengths, sub_bits = tables
+    windows = _bit_windows(payload, start_byte, chunk_bytes)
+
+    first = windows >> (WINDOW_BITS - PEEK_BITS)
+    symbols = first_symbols[first]
+    code_lengths = first_lengths[first]
+
+    links = first_links[first]
+    long_codes = np.flatnonzero(links >= 0)
+    if len(long_codes):
+        rest = (windows[long_codes] >> (WINDOW_BITS - PEEK_BITS - sub_bits)) & ((1 << sub_bits) - 1)
+        sub_index = links[long_codes] + rest
+        symbols[long_codes] = sub_symbols[sub_index]
+        code_lengths[long_codes] = sub_lengths[sub_index]
+
+    return symbols, code_lengths
+
+
+def huffman_executor(workers: int = 1):
+    """
+    Пул процессов для параллельного декодирования подпотоков и обработки блоков;
+    при workers <= 1 - пустой контекст (executor = None, всё выполняется по очереди).
+    """
+    if workers > 1:
+        return ProcessPoolExecutor(max_workers=workers)
+    return nullcontext()
+
+
+def _decode_payload(payload: np.ndarray, tables, n: int) -> np.ndarray:
+    """
+    Декодирует n символов из битового потока payload по таблицам декодирования.
+    """
+    # Размер результата известен заранее - выделяем буфер сразу
+    decoded_data = np.empty(n, dtype=tables[0].dtype)
+    decoded = 0
+    position = 0  # Текущая битовая позиция в потоке
+    # Короткий поток (маленький блок) не дополняем до полного чанка
+    chunk_bytes = max(1, min(DECODE_CHUNK_BYTES, len(payload)))
+    chunk_bits = chunk_bytes * 8
+    for start_byte in range(0, len(payload), chunk_bytes):
+        if decoded == n:
+            break
+        symbols, code_lengths = _lookup_chunk(payload, start_byte, chunk_bytes, tables)
+        # Переход к следующему коду; для неверных записей (длина 0) - выход из чанка
+        next_positions = np.arange(chunk_bits, dtype=np.int64) + code_lengths
+        next_positions[code_lengths == 0] = chunk_bits + WINDOW_BITS
+        next_positions = next_positions.tolist()
+
+        # Последовательный проход: на каждом шаге целый код, а не один бит
+        local = position - start_byte * 8
+        positions = []
+        remaining = n - decoded
+        while local < chunk_bits and len(positions) < remaining:
+            positions.append(local)
+            local = next_positions[local]
+        if local >= chunk_bits + WINDOW_BITS:
+            raise ValueError("Некорректные данные Хаффмана: неизвестный код")
+
+        positions = np.array(positions, dtype=np.int64)
+        decoded_data[decoded:decoded + len(positions)] = symbols[positions]
+        decoded += len(positions)
+        position = start_byte * 8 + local
+
+    if decoded != n:
+        raise ValueError("Некорректные данные Хаффмана: поток закончился раньше времени")
+    return decoded_data
+
+
+def _decode_substream(task: tuple) -> np.ndarray:
+    """Декодирует один подпоток (функция верхнего уровня - для пула процессов)."""
+    payload, lengths, n = task
+    return _decode_payload(np.frombuffer(payload, dtype=np.uint8), build_decode_tables(lengths), n)
+
+
+def huffman_decompress(compressed_data: bytes, executor=None) -> bytes:
+    """
+    Восстанавливает данные, сжатые huffman_compress. Подпотоки многопоточного
+    формата декодируются через executor.map, если передан пул (например,
+    concurrent.futures.ProcessPoolExecutor), иначе по очереди.
+    """
+    return huffman_decompress_symbols(compressed_data, ALPHABET_SIZE, executor).tobytes()
+
+
+def huffman_decompress_symbols(compressed_data: bytes, alphabet_size: int, executor=None) -> np.ndarray:
+    """
+    Восстанавливает массив символов, сжатый huffman_compress_symbols.
+    """
+    lengths_size = (alphabet_size + 1) // 2
+    header_size = lengths_size + 4 + 1
+    lengths = unpack_code_lengths(compressed_data, alphabet_size)
+    n = int.from_bytes(compressed_data[lengths_size:lengths_size + 4], 'big')
+
+    if compressed_data[header_size - 1] != 0:
+        payload = np.frombuffer(compressed_data, dtype=np.uint8, offset=header_size)
+        return _decode_payload(payload, build_decode_tables(lengths), n)
+
+    # Заголовок подпотоков: их количество и размеры
+    streams = compressed_data[header_size]
+    offset = header_size + 1 + 4 * streams
+    tasks = []
+    for k in range(streams):
+        size_offset = header_size + 1 + 4 * k
+        size = int.from_bytes(compressed_data[size_offset:size_offset + 4], 'big')
+        tasks.append((compressed_data[offset:offset + size], lengths, (n - k + streams - 1) // streams))
+        offset += size
+
+    decoded_streams = executor.map(_decode_substream, tasks) if executor else map(_decode_substream, tasks)
+    decoded_data = np.empty(n, dtype=np.uint8 if alphabet_size <= 256 else np.uint16)
+    for k, decoded in enumerate(decoded_streams):
+        decoded_data[k::streams] = decoded
+    return decoded_data
+
+
+# --- Контекстный режим первого порядка ---
+#
+# Код символа выбирается по предыдущему байту: контексты (256 возможных
+# предыдущих байт) объединяются в не более чем ORDER1_MAX_TABLES групп, у каждой
+# группы своя таблица длин кодов (не длиннее ORDER1_MAX_CODE_LENGTH, чтобы
+# декодер обходился одной таблицей на 2^12 записей). Первый символ кодируется
+# в контексте 0.
+#
+# Формат (после байта режима ORDER1_MODE):
+#   4 байта       - количество символов
+#   1 байт        - количество таблиц K
+#   256 байт      - номер таблицы для каждого контекста
+#   128*K байт    - длины кодов таблиц (по 4 бита)
+#   1 байт        - число бит выравнивания; далее биты кодов
+# Если контекстная модель не выигрывает у обычной, пишется ORDER0_MODE
+# и обычный поток huffman_compress.
+
+ORDER0_MODE = 0
+ORDER1_MODE = 1
+ORDER1_MAX_TABLES = 16
+ORDER1_MAX_CODE_LENGTH = 12
+ORDER1_PASSES = 4
+# Цена (в битах) символа, которого нет в таблице группы, при выборе группы
+MISSING_SYMBOL_COST = 32
+
+
+def _order1_tables(pair_counts: np.ndarray, max_tables: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Группирует контексты и строит таблицы длин кодов.
+    Начальное разбиение: самые частые контексты получают отдельные таблицы,
+    остальные - общую. Затем несколько проходов: стоимость кодирования каждого
+    контекста каждой таблицей считается одним матричным произведением,
+    и контекст переходит к самой дешёвой таблице.
+    Возвращает (номер таблицы для каждого контекста, длины кодов [K, 256]).
+    """
+    context_totals = pair_counts.sum(axis=1)
+    used_contexts = int(np.count_nonzero(context_totals))
+    table_count = max(1, min(max_tables, used_contexts))
+    assignment = np.full(ALPHABET_SIZE, table_count - 1, dtype=np.int64)
+    assignment[np.argsort(-context_totals, kind='stable')[:table_count - 1]] = np.arange(table_count - 1)
+
+    for _ in range(ORDER1_PASSES + 1):
+        # Гистограммы групп: сумма гистограмм входящих в группу контекстов
+        membership = np.zeros((table_count, ALPHABET_SIZE), dtype=np.int64)
+        membership[assignment, np.arange(ALPHABET_SIZE)] = 1
+        group_counts = membership @ pair_counts
+        # Пустые группы выбрасываем и перенумеровываем оставшиеся
+        non_empty = np.flatnonzero(group_counts.sum(axis=1))
+        remap = np.zeros(table_count, dtype=np.int64)
+        remap[non_empty] = np.arange(len(non_empty))
+        assignment = remap[assignment]
+        group_counts = group_counts[non_empty]
+        table_count = len(non_empty)
+        lengths = np.array([build_code_lengths(counts, ORDER1_MAX_CODE_LENGTH) for counts in group_counts])
+        if _ == ORDER1_PASSES:
+            break
+
+        costs = pair_counts @ np.where(lengths > 0, lengths, MISSING_SYMBOL_COST).T.astype(np.int64)
+        assignment = np.where(context_totals > 0, np.argmin(costs, axis=1), assignment)
+
+    return assignment, lengths
+
+
+def huffman_compress_order1(data: bytes, max_tables: int = ORDER1_MAX_TABLES, fallback: bool = True) -> bytes:
+    """
+    Сжимает данные контекстным кодом Хаффмана первого порядка.
+    При fallback=True, если контексты слишком разрежены и отдельные таблицы
+    не окупают свой заголовок, выбирается обычный код нулевого порядка.
+    """
+    symbols = np.frombuffer(data, dtype=np.uint8)
+    if len(symbols) == 0:
+        return bytes([ORDER0_MODE]) + huffman_compress(data)
+    previous = np.concatenate([[0], symbols[:-1]]).astype(np.int64)
+    pair_index = previous * ALPHABET_SIZE + symbols
+    pair_counts = np.bincount(pair_index, minlength=ALPHABET_SIZE * ALPHABET_SIZE).reshape(ALPHABET_SIZE,
+                                                                                             ALPHABET_SIZE)
+
+    assignment, lengths = _order1_tables(pair_counts, max_tables)
+    total_bits = int(np.sum(pair_counts * lengths[assignment].astype(np.int64)))
+    header_size = 4 + 1 + ALPHABET_SIZE + LENGTHS_HEADER_SIZE * len(lengths) + 1
+
+    if fallback:
+        order0_lengths = build_code_lengths(pair_counts.sum(axis=0))
+        order0_bits = int(np.dot(pair_counts.sum(axis=0), order0_lengths.astype(np.int64)))
+        if HEADER_SIZE + order0_bits // 8 <= header_size + total_bits // 8:
+            return bytes([ORDER0_MODE]) + huffman_compress(data)
+
+    codes = np.concatenate([canonical_codes(table) for table in lengths])
+    padding = 8 - total_bits % 8
+    payload = pack_codes(assignment[previous] * ALPHABET_SIZE + symbols, codes, lengths.ravel(),
+                         (total_bits + padding) // 8)
+
+    header = bytearray([ORDER1_MODE])
+    header.extend(len(data).to_bytes(4, 'big'))
+    header.append(len(lengths))
+    header.extend(assignment.astype(np.uint8).tobytes())
+    for table in lengths:
+        header.extend(pack_code_lengths(table))
+    header.append(padding)
+    return bytes(header) + payload.tobytes()
+
+
+def huffman_decompress_order1(compressed_data: bytes, executor=None) -> bytes:
+    """
+    Восстанавливает данные, сжатые huffman_compress_order1.
+    """
+    if compressed_data[0] == ORDER0_MODE:
+        return huffman_decompress(compressed_data[1:], executor)
+
+    n = int.from_bytes(compressed_data[1:5], 'big')
+    table_count = compressed_data[5]
+    assignment = np.frombuffer(compressed_data, dtype=np.uint8, count=ALPHABET_SIZE, offset=6)
+    offset = 6 + ALPHABET_SIZE
+
+    # Для каждой группы - одноуровневая таблица по старшим ORDER1_MAX_CODE_LENGTH битам окна
+    tables = []
+    for _ in range(table_count):
+        lengths = unpack_code_lengths(compressed_data[offset:offset + LENGTHS_HEADER_SIZE])
+        offset += LENGTHS_HEADER_SIZE
+        tables.append(_direct_decode_table(lengths, ORDER1_MAX_CODE_LENGTH))
+    # Таблица для следующего символа сразу по предыдущему символу
+    next_tables = [tables[group] for group in assignment.tolist()]
+    payload = np.frombuffer(compressed_data, dtype=np.uint8, offset=offset + 1)
+
+    decoded_data = bytearray(n)
+    decoded = 0
+    position = 0
+    table = next_tables[0]
+    shift = WINDOW_BITS - ORDER1_MAX_CODE_LENGTH
+    chunk_bytes = max(1, min(DECODE_CHUNK_BYTES, len(payload)))
+    chunk_bits = chunk_bytes * 8
+    for start_byte in range(0, len(payload), chunk_bytes):
+        if decoded == n:
+            break
+        windows = (_bit_windows(payload, start_byte, chunk_bytes) >> shift).tolist()
+        local = position - start_byte * 8
+        while local < chunk_bits and decoded < n:
+            entry = table[windows[local]]
+            if entry == 0:
+                raise ValueError("Некорректные данные Хаффмана: неизвестный код")
+            symbol = entry & 0xFF
+            decoded_data[decoded] = symbol
+            decoded += 1
+            local += entry >> DIRECT_LENGTH_SHIFT
+            table = next_tables[symbol]
+        position = start_byte * 8 + local
+
+    if decoded != n:
+        raise ValueError("Некорректные данные Хаффмана: поток закончился раньше времени")
+    return bytes(decoded_data)
+
+
+# --- Несколько таблиц с селекторами (как в bzip2) ---
+#
+# Символы делятся на группы по SELECTOR_GROUP_SIZE, для каждой группы выбирается
+# одна из 2-6 таблиц длин кодов (селектор). Таблицы уточняются несколькими
+# проходами: стоимость всех групп во всех таблицах - одно матричное произведение,
+# группа переходит к самой дешёвой таблице, таблицы перестраиваются по своим группам.
+# Селекторы проходят через MTF и записываются унарным кодом (0 -> "0", 1 -> "10", ...).
+#
+# Формат:
+#   4 байта                        - количество символов n
+#   1 байт                         - количество таблиц T
+#   T * ((alphabet_size + 1) // 2) - длины кодов таблиц (по 4 бита)
+#   далее                          - селекторы ceil(n / 50) групп, дополненные до байта
+#   далее                          - биты кодов символов
+
+SELECTOR_GROUP_SIZE = 50
+MULTI_TABLE_PASSES = 4
+# Запись прямой таблицы декодирования: символ | (длина << DIRECT_LENGTH_SHIFT)
+DIRECT_LENGTH_SHIFT = 16
+
+
+def _table_count(n: int) -> int:
+    """Количество таблиц по числу символов блока (пороги bzip2)."""
+    if n < 200:
+        return 2
+    if n < 600:
+        return 3
+    if n < 1200:
+        return 4
+    if n < 2400:
+        return 5
+    return 6
+
+
+def _direct_decode_table(lengths, table_bits: int) -> list:
+    """
+    Одноуровневая таблица декодирования по table_bits старшим битам окна:
+    запись = символ | (длина << DIRECT_LENGTH_SHIFT); 0 - некорректный код.
+    """
+    codes = canonical_codes(lengths)
+    table = np.zeros(1 << table_bits, dtype=np.int64)
+    for symbol in np.flatnonzero(lengths):
+        length = int(lengths[symbol])
+        start = int(codes[symbol]) << (table_bits - length)
+        table[start:start + (1 << (table_bits - length))] = symbol | (length << DIRECT_LENGTH_SHIFT)
+    return table.tolist()
+
+
+def _multi_tables(group_counts: np.ndarray, table_count: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Подбирает таблицы и селекторы групп. Начальное разбиение, как в bzip2:
+    алфавит делится на table_count диапазонов с примерно равной суммарной частотой,
+    таблица "дешева" для своего диапазона. Возвращает (селекторы, длины [T, A]).
+    """
+    alphabet_size = group_counts.shape[1]
+    totals = group_counts.sum(axis=0)
+    cumulative = np.cumsum(totals)
+    ranges = np.minimum(cumulative * table_count // max(int(cumulative[-1]), 1), table_count - 1)
+    lengths = np.where(ranges[None, :] == np.arange(table_count)[:, None], 0, MAX_CODE_LENGTH)
+
+    for _ in range(MULTI_TABLE_PASSES + 1):
+        costs = group_counts @ lengths.T.astype(np.int64)
+        selectors = np.argmin(costs, axis=1)
+        # Таблицы без групп выбрасываем и перенумеровываем оставшиеся
+        used = np.unique(selectors)
+        remap = np.zeros(len(lengths), dtype=np.int64)
+        remap[used] = np.arange(len(used))
+        selectors = remap[selectors]
+        membership = np.zeros((len(used), len(selectors)), dtype=np.int64)
+        membership[selectors, np.arange(len(selectors))] = 1
+        table_counts = membership @ group_counts
+        lengths = np.array([build_code_lengths(counts) for counts in table_counts]).reshape(-1, alphabet_size)
+        lengths = np.where(lengths > 0, lengths, MISSING_SYMBOL_COST)
+    return selectors, np.where(lengths == MISSING_SYMBOL_COST, 0, lengths).astype(np.uint8)
+
+
+def _selector_ranks(selectors: np.ndarray, table_count: int) -> np.ndarray:
+    """MTF по номерам таблиц: ранг селектора каждой группы."""
+    order = list(range(table_count))
+    ranks = []
+    for selector in selectors.tolist():
+        rank = order.index(selector)
+        ranks.append(rank)
+        order.insert(0, order.pop(rank))
+    return np.array(ranks, dtype=np.int64)
+
+
+def huffman_compress_tables(symbols: np.ndarray, alphabet_size: int) -> bytes:
+    """
+    Сжимает массив символов кодом Хаффмана с несколькими таблицами
+    и селектором на каждую группу из SELECTOR_GROUP_SIZE символов.
+    """
+    symbols = np.asarray(symbols).astype(np.int64)
+    n = len(symbols)
+    header = bytearray(n.to_bytes(4, 'big'))
+    if n == 0:
+        return bytes(header + bytes([0]))
+    group_numbers = np.arange(n) // SELECTOR_GROUP_SIZE
+    group_count = int(group_numbers[-1]) + 1
+    group_counts = np.bincount(group_numbers * alphabet_size + symbols,
+                               minlength=group_count * alphabet_size).reshape(group_count, alphabet_size)
+
+    # Число таблиц (не больше порога bzip2) выбирается по полному размеру потока:
+    # каждая таблица добавляет (alphabet_size + 1) // 2 байт заголовка
+    lengths_size = (alphabet_size + 1) // 2
+    best_size = None
+    for table_count in range(2, _table_count(n) + 1):
+        candidate_selectors, candidate_lengths = _multi_tables(group_counts, table_count)
+        candidate_ranks = _selector_ranks(candidate_selectors, len(candidate_lengths))
+        group_costs = np.sum(group_counts * candidate_lengths[candidate_selectors], axis=1)
+        size = (len(candidate_lengths) * lengths_size + (int(np.sum(candidate_ranks + 1)) + 7) // 8
+                + (int(np.sum(group_costs)) + 7) // 8)
+        if best_size is None or size < best_size:
+            best_size = size
+            selectors, lengths, ranks = candidate_selectors, candidate_lengths, candidate_ranks
+
+    header.append(len(lengths))
+    for table in lengths:
+        header.extend(pack_code_lengths(table))
+
+    # Селекторы: MTF по номерам таблиц, затем унарный код
+    unary_lengths = np.arange(1, len(lengths) + 1)
+    unary_codes = (1 << unary_lengths) - 2
+    selector_bits = int(np.sum(ranks + 1))
+    header.extend(pack_codes(ranks, unary_codes, unary_lengths, (selector_bits + 7) // 8).tobytes())
+
+    # Коды символов: таблица выбирается селектором группы
+    flat_symbols = selectors[group_numbers] * alphabet_size + symbols
+    flat_lengths = lengths.ravel()
+    codes = np.concatenate([canonical_codes(table) for table in lengths])
+    total_bits = int(np.sum(flat_lengths[flat_symbols].astype(np.int64)))
+    payload = pack_codes(flat_symbols, codes, flat_lengths, (total_bits + 7) // 8)
+    return bytes(header) + payload.tobytes()
+
+
+def huffman_decompress_tables(compressed_data: bytes, alphabet_size: int) -> np.ndarray:
+    """
+    Восстанавливает массив символов, сжатый huffman_compress_tables.
+    Таблицы декодирования строятся один раз; при смене группы меняется только
+    ссылка на таблицу.
+    """
+    n = int.from_bytes(compressed_data[:4], 'big')
+    table_count = compressed_data[4]
+    symbol_type = np.uint8 if alphabet_size <= 256 else np.uint16
+    if n == 0:
+        return np.zeros(0, dtype=symbol_type)
+    lengths_size = (alphabet_size + 1) // 2
+    offset = 5
+    tables = []
+    for _ in range(table_count):
+        lengths = unpack_code_lengths(compressed_data[offset:offset + lengths_size], alphabet_size)
+        tables.append(_direct_decode_table(lengths, MAX_CODE_LENGTH))
+        offset += lengths_size
+
+    # Унарные селекторы: k-й нулевой бит завершает k-й селектор
+    group_count = (n + SELECTOR_GROUP_SIZE - 1) // SELECTOR_GROUP_SIZE
+    bits = np.unpackbits(np.frombuffer(compressed_data, dtype=np.uint8, offset=offset))
+    ends = np.flatnonzero(bits == 0)[:group_count]
+    if len(ends) < group_count:
+        raise ValueError("Некорректные данные Хаффмана: обрезаны селекторы")
+    ranks = np.diff(np.concatenate([[-1], ends])) - 1
+    order = list(range(table_count))
+    group_tables = []
+    for rank in ranks.tolist():
+        if rank >= table_count:
+            raise ValueError("Некорректные данные Хаффмана: неверный селектор")
+        selector = order.pop(rank)
+        order.insert(0, selector)
+        group_tables.append(tables[selector])
+    payload = np.frombuffer(compressed_data, dtype=np.uint8, offset=offset + (int(ends[-1]) + 8) // 8)
+
+    decoded_data = [0] * n
+    decoded = 0
+    position = 0
+    shift = WINDOW_BITS - MAX_CODE_LENGTH
+    symbol_mask = (1 << DIRECT_LENGTH_SHIFT) - 1
+    chunk_bytes = max(1, min(DECODE_CHUNK_BYTES, len(payload)))
+    chunk_bits = chunk_bytes * 8
+    for start_byte in range(0, len(payload), chunk_bytes):
+        if decoded == n:
+            break
+        windows = (_bit_windows(payload, start_byte, chunk_bytes) >> shift).tolist()
+        local = position - start_byte * 8
+        while local < chunk_bits and decoded < n:
+            table = group_tables[decoded // SELECTOR_GROUP_SIZE]
+            group_end = min(decoded + SELECTOR_GROUP_SIZE - decoded % SELECTOR_GROUP_SIZE, n)
+            while local < chunk_bits and decoded < group_end:
+                entry = table[windows[local]]
+                if entry == 0:
+                    raise ValueError("Некорректные данные Хаффмана: неизвестный код")
+                decoded_data[decoded] = entry & symbol_mask
+                decoded += 1
+                local += entry >> DIRECT_LENGTH_SHIFT
+        position = start_byte * 8 + local
+
+    if decoded != n:
+        raise ValueError("Некорректные данные Хаффмана: поток закончился раньше времени")
+    return np.array(decoded_data, dtype=symbol_type)
+
+
+# --- Потоковый (поблочный) режим ---
+#
+# Файл - байт порядка модели (0 или 1), затем последовательность блоков:
+# 4 байта размера сжатого блока + поток huffman_compress (или
+# huffman_compress_order1) для блока со своими таблицами длин кодов.
+# Данные читаются и пишутся по блоку, поэтому память не зависит от размера файла.
+
+def huffman_compress_stream(source, destination, block_size: int = STREAM_BLOCK_SIZE,
+                            streams: int = 1, order: int = 0) -> int:
+    """
+    Сжимает файловый объект source поблочно в destination.
+    order=1 включает контекстную модель первого порядка (подпотоки при этом не используются).
+    Возвращает количество записанных байт.
+    """
+    destination.write(bytes([order]))
+    written = 1
+    while True:
+        block = source.read(block_size)
+        if not block:
+            break
+        if order == 1:
+            compressed_block = huffman_compress_order1(block)
+        else:
+            compressed_block = huffman_compress(block, streams)
+        destination.write(len(compressed_block).to_bytes(4, 'big'))
+        destination.write(compressed_block)
+        written += 4 + len(compressed_block)
+    return written
+
+
+def huffman_decompress_stream(source, destination, workers: int = 1) -> int:
+    """
+    Восстанавливает данные, сжатые huffman_compress_stream.
+    При workers > 1 подпотоки блоков декодируются в пуле процессов.
+    Возвращает количество записанных байт.
+    """
+    order = source.read(1)[0]
+    with huffman_executor(workers) as executor:
+        return _decompress_blocks(source, destination, executor, order)
+
+
+def _decompress_blocks(source, destination, executor, order: int) -> int:
+    decompress = huffman_decompress_order1 if order == 1 else huffman_decompress
+    written = 0
+    while True:
+        size_bytes = source.read(4)
+        if not size_bytes:
+            break
+        block_size = int.from_bytes(size_bytes, 'big')
+        compressed_block = source.read(block_size)
+        if len(size_bytes) < 4 or len(compressed_block) < block_size:
+            raise ValueError("Некорректные данные Хаффмана: блок обрезан")
+        block = decompress(compressed_block, executor)
+        destination.write(block)
+        written += len(block)
+    return written
@@ -0,0 +1,108 @@
+import numpy as np
+
+# --- Move-to-Front ---
+#
+# После BWT данные состоят из длинных серий одинаковых байт. Внутри серии MTF
+# всегда выдаёт 0, поэтому последовательно обрабатываются только начала серий,
+# а остальное заполняется векторно. Таблица рангов - bytearray: поиск символа
+# (find) и сдвиг префикса срезом выполняются на уровне C.
+
+
+def mtf_transform(data: bytes) -> bytes:
+    """Move-to-Front кодирование."""
+    symbols = np.frombuffer(data, dtype=np.uint8)
+    if len(symbols) == 0:
+        return b""
+    run_starts = np.flatnonzero(np.concatenate([[True], symbols[1:] != symbols[:-1]]))
+
+    alphabet = bytearray(range(256))
+    ranks = []
+    for byte in symbols[run_starts].tolist():
+        index = alphabet.find(byte)
+        ranks.append(index)
+        alphabet[1:index + 1] = alphabet[:index]
+        alphabet[0] = byte
+
+    transformed = np.zeros(len(symbols), dtype=np.uint8)
+    transformed[run_starts] = ranks
+    return transformed.tobytes()
+
+
+def mtf_inverse(transformed_data: bytes) -> bytes:
+    """Обратное Move-to-Front преобразование."""
+    indices = np.frombuffer(transformed_data, dtype=np.uint8)
+    if len(indices) == 0:
+        return b""
+    # Ненулевой ранг начинает новую серию; ранг 0 повторяет предыдущий символ
+    run_starts = np.concatenate([[True], indices[1:] != 0])
+
+    alphabet = bytearray(range(256))
+    values = bytearray()
+    for index in indices[run_starts].tolist():
+        byte = alphabet[index]
+        values.append(byte)
+        alphabet[1:index + 1] = alphabet[:index]
+        alphabet[0] = byte
+
+    run_numbers = np.cumsum(run_starts) - 1
+    return np.frombuffer(bytes(values), dtype=np.uint8)[run_numbers].tobytes()
+
+
+# --- Кодирование серий нулей (RUNA/RUNB, как в bzip2) ---
+#
+# После MTF преобладают серии нулей. Длина серии записывается в биективной
+# двоичной системе двумя символами: RUNA - разряд 1, RUNB - разряд 2
+# (младший разряд первым). Ненулевой ранг v записывается как v + 1,
+# в конце блока - EOB. Итого алфавит из 258 символов.
+
+RUNA = 0
+RUNB = 1
+EOB = 257
+ZERO_RUN_ALPHABET_SIZE = 258
+
+
+def zero_run_encode(mtf_data: bytes) -> np.ndarray:
+    """Заменяет серии нулей после MTF символами RUNA/RUNB; возвращает массив uint16."""
+    ranks = np.frombuffer(mtf_data, dtype=np.uint8)
+    n = len(ranks)
+    is_zero = ranks == 0
+    # Элемент - ненулевой ранг или целая серия нулей (начинается с первого нуля серии)
+    item_starts = np.flatnonzero(~is_zero | np.concatenate([[True], ~is_zero[:-1]]))
+    item_lengths = np.diff(np.append(item_starts, n))
+    zero_items = is_zero[item_starts]
+
+    # Длина L записывается битами числа L + 1 без старшей единицы
+    run_values = item_lengths + 1
+    digits_count = np.where(zero_items, np.floor(np.log2(run_values)).astype(np.int64), 1)
+    offsets = np.cumsum(digits_count) - digits_count
+    total = int(digits_count.sum())
+
+    encoded = np.empty(total + 1, dtype=np.uint16)
+    item_numbers = np.repeat(np.arange(len(item_starts)), digits_count)
+    digit_positions = np.arange(total) - offsets[item_numbers]
+    encoded[:total] = np.where(zero_items[item_numbers],
+                               (run_values[item_numbers] >> digit_positions) & 1,
+                               ranks[item_starts][item_numbers].astype(np.int64) + 1)
+    encoded[total] = EOB
+    return encoded
+
+
+def zero_run_decode(symbols: np.ndarray) -> bytes:
+    """Обратное преобразование zero_run_encode."""
+    symbols = np.asarray(symbols, dtype=np.int64)
+    if len(symbols) == 0 or symbols[-1] != EOB:
+        raise ValueError("Некорректные данные RUNA/RUNB: нет символа конца блока")
+    symbols = symbols[:-1]
+    n = len(symbols)
+    if n == 0:
+        return b""
+    is_run = symbols <= RUNB
+    item_mask = ~is_run | np.concatenate([[True], ~is_run[:-1]])
+    item_starts = np.flatnonzero(item_mask)
+
+    # Разряд серии с номером i внутри группы RUNA/RUNB даёт (символ + 1) << i
+    last_start = np.maximum.accumulate(np.where(item_mask, np.arange(n), 0))
+    weights = np.where(is_run, (symbols + 1) << (np.arange(n) - last_start), 1)
+    counts = np.add.reduceat(weights, item_starts)
+    values = np.where(is_run[item_starts], 0, symbols[item_starts] - 1)
+    return np.repeat(values.astype(np.uint8), counts).tobytes()
@@ -0,0 +1,109 @@
+import numpy as np
+
+# --- Адаптивный двоичный интервальный (range) кодер ---
+#
+# Целочисленная реализация в стиле LZMA: байт кодируется восемью двоичными
+# решениями по дереву битов (255 вероятностей на весь алфавит), вероятности
+# 11-битные и подстраиваются после каждого бита. Таблица частот не хранится.
+# Символы большего алфавита (range_compress_symbols) кодируются деревом из
+# (alphabet_size - 1).bit_length() уровней.
+#
+# Формат сжатого потока:
+#   4 байта  - количество закодированных байт (big-endian)
+#   далее    - выход интервального кодера
+
+PROB_BITS = 11
+PROB_INIT = 1 << (PROB_BITS - 1)
+MOVE_BITS = 5
+TOP = 1 << 24
+HEADER_SIZE = 4
+
+
+def range_compress(data: bytes) -> bytes:
+    return range_compress_symbols(data, 256)
+
+
+def range_compress_symbols(data, alphabet_size: int) -> bytes:
+    """Сжимает последовательность символов алфавита из alphabet_size символов."""
+    bits = max((alphabet_size - 1).bit_length(), 1)
+    probs = [PROB_INIT] * (1 << bits)
+    output = bytearray(len(data).to_bytes(HEADER_SIZE, 'big'))
+    low = 0
+    range_ = 0xFFFFFFFF
+    cache = 0
+    cache_size = 1
+
+    def shift_low():
+        # Перенос из старшего разряда выталкивает отложенные байты 0xFF
+        nonlocal low, cache, cache_size
+        if low < 0xFF000000 or low >= 1 << 32:
+            carry = low >> 32
+            output.append((cache + carry) & 0xFF)
+            output.extend([(0xFF + carry) & 0xFF] * (cache_size - 1))
+            cache_size = 0
+            cache = (low >> 24) & 0xFF
+        cache_size += 1
+        low = (low & 0x00FFFFFF) << 8
+
+    for byte in (data.tolist() if isinstance(data, np.ndarray) else data):
+        node = 1
+        for shift in range(bits - 1, -1, -1):
+            bit = (byte >> shift) & 1
+            prob = probs[node]
+            bound = (range_ >> PROB_BITS) * prob
+            if bit:
+                low += bound
+                range_ -= bound
+                probs[node] = prob - (prob >> MOVE_BITS)
+            else:
+                range_ = bound
+                probs[node] = prob + (((1 << PROB_BITS) - prob) >> MOVE_BITS)
+            node = (node << 1) | bit
+            while range_ < TOP:
+                range_ <<= 8
+                shift_low()
+
+    for _ in range(5):
+        shift_low()
+    return bytes(output)
+
+
+def range_decompress(compressed_data: bytes) -> bytes:
+    return range_decompress_symbols(compressed_data, 256).tobytes()
+
+
+def range_decompress_symbols(compressed_data: bytes, alphabet_size: int) -> np.ndarray:
+    """Восстанавливает массив символов, сжатый range_compress_symbols."""
+    n = int.from_bytes(compressed_data[:HEADER_SIZE], 'big')
+    bits = max((alphabet_size - 1).bit_length(), 1)
+    top_node = 1 << bits
+    probs = [PROB_INIT] * top_node
+    decoded_data = [0] * n
+
+    # Первый байт выхода кодера всегда 0 (начальный cache)
+    stream = compressed_data[HEADER_SIZE:] + bytes(4)
+    code = int.from_bytes(stream[1:5], 'big')
+    position = 5
+    range_ = 0xFFFFFFFF
+
+    for i in range(n):
+        node = 1
+        while node < top_node:
+            prob = probs[node]
+            bound = (range_ >> PROB_BITS) * prob
+            if code < bound:
+                range_ = bound
+                probs[node] = prob + (((1 << PROB_BITS) - prob) >> MOVE_BITS)
+                node <<= 1
+            else:
+                code -= bound
+                range_ -= bound
+                probs[node] = prob - (prob >> MOVE_BITS)
+                node = (node << 1) | 1
+            while range_ < TOP:
+                range_ <<= 8
+                code = (code << 8) | (stream[position] if position < len(stream) else 0)
+                position += 1
+        decoded_data[i] = node - top_node
+
+    return np.array(decoded_data, dtype=np.uint8 if alphabet_size <= 256 else np.uint16)
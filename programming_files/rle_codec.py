@@ -0,0 +1,500 @@
+import numpy as np
+
+# --- Кодеки RLE ---
+#
+# Три формата записей: PackBits (длины до 128), формат с флагом 0x80 (длины
+# до 127) и формат с длинами varint без ограничения длины серии. Поток
+# rle_encode начинается с байта формата, поэтому rle_decode восстанавливает
+# любой из них.
+#
+# Декодирование: длина записи зависит только от её заголовка, поэтому сначала
+# последовательно находятся начала записей (без работы с отдельными байтами
+# данных), а затем выход собирается одной выборкой: для каждого байта выхода
+# вычисляется его позиция в сжатых данных.
+
+
+def scan_records(compressed_data: bytes, record_sizes: list) -> np.ndarray:
+    """
+    Возвращает позиции однобайтовых заголовков записей.
+    record_sizes[c] - полный размер записи с заголовком c.
+    Последняя запись может выходить за конец данных - это проверяет вызывающий.
+    """
+    starts = []
+    i = 0
+    n = len(compressed_data)
+    while i < n:
+        starts.append(i)
+        i += record_sizes[compressed_data[i]]
+    return np.array(starts, dtype=np.int64)
+
+
+def expand_records(compressed_data: bytes, payload_starts: np.ndarray, is_literal: np.ndarray,
+                   lengths: np.ndarray) -> bytes:
+    """
+    Собирает выход по записям: литералы копируются из сжатых данных,
+    байт повтора размножается lengths раз. payload_starts - позиции данных записей.
+    """
+    source = np.frombuffer(compressed_data, dtype=np.uint8)
+    lengths = lengths.astype(np.int64)
+    total = int(lengths.sum())
+    output_starts = np.cumsum(lengths) - lengths
+    # Позиция в сжатых данных: начало данных записи, для литералов плюс номер байта
+    positions = np.repeat(payload_starts, lengths)
+    literal_bytes = np.repeat(is_literal, lengths)
+    positions[literal_bytes] += (np.arange(total) - np.repeat(output_starts, lengths))[literal_bytes]
+    return source[positions].tobytes()
+
+
+# --- PackBits RLE (comp_RLE) ---
+
+def packbits_rle_compress(data: bytes) -> bytes:
+    """
+    Сжимает данные с использованием PackBits-подобного RLE.
+    Управляющий байт N:
+    - 0 <= N <= 127: Следующие N+1 байт - литералы (копируются как есть).
+    - 129 <= N <= 255: Следующий байт повторить 258-N раз (для длин от 3 до 128).
+    - N = 128: Зарезервировано (здесь игнорируется/не используется при кодировании).
+
+    Векторизованная версия: данные делятся на серии одинаковых байт; серии длиной
+    от 3 кодируются повторами, промежутки между ними - литералами. Разбиение
+    по MAX_LEN считается арифметикой над массивами, выход собирается в один буфер.
+    Результат байт в байт совпадает с прежним побайтовым кодером, включая его
+    особенность: если перед серией остаётся ровно 127 литералов, блок литералов
+    добирает до 128 первым байтом серии.
+    """
+    MAX_LEN = 128 # Макс. длина для одного блока литералов (N+1) или повторов (258-N -> до 128 раз)
+    symbols = np.frombuffer(data, dtype=np.uint8)
+    n = len(symbols)
+    if n == 0:
+        return b""
+
+    # 1. Границы серий одинаковых байт; длинные серии (от 3) - кандидаты в повторы
+    run_starts = np.flatnonzero(np.diff(symbols)) + 1
+    run_starts = np.concatenate([[0], run_starts])
+    run_lengths = np.diff(np.append(run_starts, n))
+    long_runs = run_lengths >= 3
+    positions = run_starts[long_runs]
+    lengths = run_lengths[long_runs]
+    # Литералы перед каждой длинной серией (без остатка предыдущей серии)
+    gaps = positions - np.concatenate([[0], positions[:-1] + lengths[:-1]])
+    tail_gap = n - (int(positions[-1] + lengths[-1]) if len(positions) else 0)
+
+    # 2. Остаток серии (1-2 байта после повторов по 128) уходит в следующие литералы,
+    # а 127 литералов перед серией забирают её первый байт. Это зависит только от
+    # предыдущей серии, поэтому считается одним проходом по длинным сериям
+    stolen = []
+    leftovers = []
+    leftover = 0
+    for gap, length in zip(gaps.tolist(), lengths.tolist()):
+        steal = int((gap + leftover) % MAX_LEN == MAX_LEN - 1)
+        remainder = (length - steal) % MAX_LEN
+        leftover = remainder if remainder < 3 else 0
+        stolen.append(steal)
+        leftovers.append(leftover)
+    stolen = np.array(stolen, dtype=np.int64)
+    leftovers = np.array(leftovers, dtype=np.int64)
+    effective = lengths - stolen
+    literal_lengths = gaps + np.concatenate([[0], leftovers[:-1]]).astype(np.int64)
+    final_literals = tail_gap + (int(leftovers[-1]) if len(positions) else 0)
+
+    # 3. Единицы в порядке вывода: литералы_0, серия_0, литералы_1, ..., литералы_конца.
+    # У каждой - число полных блоков по 128 и длина последнего неполного блока (0 - нет)
+    literal_tails = np.where(stolen == 1, MAX_LEN, literal_lengths % MAX_LEN)
+    repeat_tails = np.where(effective % MAX_LEN >= 3, effective % MAX_LEN, 0)
+    full_blocks = np.empty(2 * len(positions) + 1, dtype=np.int64)
+    tails = np.empty_like(full_blocks)
+    full_blocks[0:-1:2] = literal_lengths // MAX_LEN
+    full_blocks[1::2] = effective // MAX_LEN
+    full_blocks[-1] = final_literals // MAX_LEN
+    tails[0:-1:2] = literal_tails
+    tails[1::2] = repeat_tails
+    tails[-1] = final_literals % MAX_LEN
+    is_literal_unit = np.arange(len(full_blocks)) % 2 == 0
+
+    token_counts = full_blocks + (tails > 0)
+    unit_of_token = np.repeat(np.arange(len(full_blocks)), token_counts)
+    index_in_unit = np.arange(len(unit_of_token)) - (np.cumsum(token_counts) - token_counts)[unit_of_token]
+    token_lengths = np.where(index_in_unit < full_blocks[unit_of_token], MAX_LEN, tails[unit_of_token])
+    token_literal = is_literal_unit[unit_of_token]
+    token_starts = np.cumsum(token_lengths) - token_lengths
+
+    # 4. Сборка: управляющий байт, затем литералы или байт повтора
+    output_sizes = 1 + np.where(token_literal, token_lengths, 1)
+    output_starts = np.cumsum(output_sizes) - output_sizes
+    compressed_data = np.empty(int(output_sizes.sum()), dtype=np.uint8)
+    compressed_data[output_starts] = np.where(token_literal, token_lengths - 1, 258 - token_lengths)
+    repeats = ~token_literal
+    compressed_data[output_starts[repeats] + 1] = symbols[token_starts[repeats]]
+    # Каждый байт литерала сдвигается на смещение своего блока в выходе
+    literal_bytes = np.repeat(token_literal, token_lengths)
+    shifts = np.repeat(output_starts + 1 - token_starts, token_lengths)
+    source_positions = np.flatnonzero(literal_bytes)
+    compressed_data[source_positions + shifts[literal_bytes]] = symbols[literal_bytes]
+    return compressed_data.tobytes()
+
+
+# Размер записи PackBits и длина её выхода по управляющему байту
+PACKBITS_RECORD_SIZES = [control + 2 if control <= 127 else 2 if control >= 129 else 1 for control in range(256)]
+PACKBITS_RUN_LENGTHS = np.array([control + 1 if control <= 127 else 258 - control if control >= 129 else 0
+                                 for control in range(256)], dtype=np.int64)
+
+
+def packbits_rle_decompress(compressed_data: bytes) -> bytes:
+    """
+    Декомпрессия данных, сжатых PackBits-подобным RLE.
+    Последовательно просматриваются только управляющие байты,
+    выход собирается векторно (expand_records).
+    """
+    n = len(compressed_data)
+    starts = scan_records(compressed_data, PACKBITS_RECORD_SIZES)
+    controls = np.frombuffer(compressed_data, dtype=np.uint8)[starts]
+    if len(starts) > 0:
+        # Выйти за конец данных может только последняя запись
+        i = int(starts[-1]) + 1
+        control_byte = int(controls[-1])
+        if control_byte <= 127 and i + control_byte + 1 > n:
+            raise ValueError(f"Ошибка данных: недостаточно байт для литеральной последовательности. Индекс: {i}, нужно: {control_byte + 1}, доступно: {n-i}")
+        if control_byte >= 129 and i >= n:
+            raise ValueError(f"Ошибка данных: отсутствует байт значения для повторяющейся последовательности. Индекс: {i}")
+    # Байт 128 ('80' hex) - No-Op, его длина выхода 0
+    decompressed_data = expand_records(compressed_data, starts + 1, controls <= 127, PACKBITS_RUN_LENGTHS[controls])
+
+    return decompressed_data
+
+
+# --- RLE с флагом 0x80 (BWT+RLE) ---
+
+def flag_rle_compress(data: bytes) -> bytes:
+    """RLE с флагом 0x80: бит 7 заголовка - серия, биты 0-6 - длина (до 127)."""
+    compressed = bytearray()
+    i = 0
+    n = len(data)
+    while i < n:
+        current = data[i]
+        count = 1
+        while i + count < n and count < 127 and data[i + count] == current:
+            count += 1
+        if count > 1:
+            compressed.append(0x80 | count)  # Бит 7 = 1 для повторов
+            compressed.append(current)
+            i += count
+        else:
+            # Собираем неповторяющуюся последовательность
+            seq = bytearray()
+            seq.append(current)
+            i += 1
+            while i < n and len(seq) < 127 and (i >= n-1 or data[i] != data[i+1]):
+                seq.append(data[i])
+                i += 1
+            compressed.append(len(seq))  # Бит 7 = 0
+            compressed.extend(seq)
+    return bytes(compressed)
+
+
+# Размер записи и длина её выхода по заголовку: бит 7 - повтор (заголовок и байт),
+# иначе заголовок и header байт литералов
+RLE_RECORD_SIZES = [2 if header & 0x80 else header + 1 for header in range(256)]
+RLE_RUN_LENGTHS = np.array([header & 0x7F for header in range(256)], dtype=np.int64)
+
+
+def flag_rle_decompress(compressed_data: bytes) -> bytes:
+    """Восстанавливает данные, сжатые flag_rle_compress."""
+    n = len(compressed_data)
+    starts = scan_records(compressed_data, RLE_RECORD_SIZES)
+    headers = np.frombuffer(compressed_data, dtype=np.uint8)[starts]
+    if len(starts) > 0:
+        # Выйти за конец данных может только последняя запись
+        i = int(starts[-1]) + 1
+        header = int(headers[-1])
+        if header & 0x80 and i >= n:
+            raise ValueError("Invalid RLE data: missing byte after repeat header")
+        if not header & 0x80 and i + header > n:
+            raise ValueError(f"Invalid RLE data: expected {header} bytes, got {n - i}")
+    return expand_records(compressed_data, starts + 1, headers < 0x80, RLE_RUN_LENGTHS[headers])
+
+
+# --- RLE с длинами varint ---
+#
+# Запись: заголовок varint (LEB128: по 7 бит, младшие первыми, бит 7 -
+# продолжение), младший бит заголовка - тип записи:
+#   1 - серия: (длина - VARINT_MIN_RUN) << 1 | 1, затем байт серии;
+#   0 - литералы: (длина - 1) << 1, затем сами байты.
+# Серии от VARINT_MIN_RUN байт кодируются целиком одной записью, промежутки
+# между ними - литералами, разбитыми на блоки по VARINT_MAX_LITERAL байт
+# (чтобы потоковому кодеру хватало буфера фиксированного размера).
+
+VARINT_MIN_RUN = 3
+VARINT_MAX_LITERAL = 4096
+
+
+def _split_records(symbols: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Делит данные на записи формата varint.
+    Возвращает длины записей и признак литералов; записи идут подряд с начала данных.
+    """
+    n = len(symbols)
+    run_starts = np.concatenate([[0], np.flatnonzero(np.diff(symbols)) + 1])
+    run_lengths = np.diff(np.append(run_starts, n))
+    long_runs = run_lengths >= VARINT_MIN_RUN
+    positions = run_starts[long_runs]
+    lengths = run_lengths[long_runs]
+
+    # Единицы в порядке вывода: литералы_0, серия_0, литералы_1, ..., литералы_конца
+    gaps = np.append(positions, n) - np.concatenate([[0], positions + lengths])
+    full_blocks = np.zeros(2 * len(positions) + 1, dtype=np.int64)
+    tails = np.empty_like(full_blocks)
+    full_blocks[0::2] = gaps // VARINT_MAX_LITERAL
+    tails[0::2] = gaps % VARINT_MAX_LITERAL
+    tails[1::2] = lengths
+    is_literal_unit = np.arange(len(full_blocks)) % 2 == 0
+
+    record_counts = full_blocks + (tails > 0)
+    unit_of_record = np.repeat(np.arange(len(full_blocks)), record_counts)
+    index_in_unit = np.arange(len(unit_of_record)) - (np.cumsum(record_counts) - record_counts)[unit_of_record]
+    record_lengths = np.where(index_in_unit < full_blocks[unit_of_record], VARINT_MAX_LITERAL,
+                              tails[unit_of_record])
+    return record_lengths, is_literal_unit[unit_of_record]
+
+
+def _encode_records(symbols: np.ndarray, record_lengths: np.ndarray, is_literal: np.ndarray) -> bytes:
+    """Записывает записи varint; record_lengths покрывают symbols подряд."""
+    record_starts = np.cumsum(record_lengths) - record_lengths
+    headers = np.where(is_literal, (record_lengths - 1) << 1, ((record_lengths - VARINT_MIN_RUN) << 1) | 1)
+    header_sizes = np.ones(len(headers), dtype=np.int64)
+    while True:
+        longer = headers >= (1 << (7 * header_sizes))
+        if not longer.any():
+            break
+        header_sizes += longer
+
+    output_sizes = header_sizes + np.where(is_literal, record_lengths, 1)
+    output_starts = np.cumsum(output_sizes) - output_sizes
+    compressed_data = np.empty(int(output_sizes.sum()), dtype=np.uint8)
+    for byte_number in range(int(header_sizes.max(initial=0))):
+        present = header_sizes > byte_number
+        group = (headers[present] >> (7 * byte_number)) & 0x7F
+        more = (header_sizes[present] > byte_number + 1) * 0x80
+        compressed_data[output_starts[present] + byte_number] = group | more
+
+    payload_starts = output_starts + header_sizes
+    runs = ~is_literal
+    compressed_data[payload_starts[runs]] = symbols[record_starts[runs]]
+    literal_bytes = np.repeat(is_literal, record_lengths)
+    shifts = np.repeat(payload_starts - record_starts, record_lengths)
+    source_positions = np.flatnonzero(literal_bytes)
+    compressed_data[source_positions + shifts[literal_bytes]] = symbols[literal_bytes]
+    return compressed_data.tobytes()
+
+
+def varint_rle_compress(data: bytes) -> bytes:
+    """Сжимает данные RLE с длинами varint (без байта формата)."""
+    symbols = np.frombuffer(data, dtype=np.uint8)
+    if len(symbols) == 0:
+        return b""
+    record_lengths, is_literal = _split_records(symbols)
+    return _encode_records(symbols, record_lengths, is_literal)
+
+
+def _scan_varint_records(compressed_data: bytes, start: int = 0) -> tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    Разбирает полные записи varint начиная с позиции start.
+    Возвращает позиции данных записей, признаки литералов, длины и позицию
+    сразу после последней полной записи (неполная запись в конце не разбирается).
+    """
+    n = len(compressed_data)
+    payload_starts = []
+    lengths = []
+    literals = []
+    end = i = start
+    while i < n:
+        header = 0
+        shift = 0
+        while i < n:
+            byte = compressed_data[i]
+            i += 1
+            header |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+        else:
+            break
+        is_literal = not header & 1
+        length = (header >> 1) + (1 if is_literal else VARINT_MIN_RUN)
+        payload_end = i + (length if is_literal else 1)
+        if payload_end > n:
+            break
+        payload_starts.append(i)
+        lengths.append(length)
+        literals.append(is_literal)
+        end = i = payload_end
+    return (np.array(payload_starts, dtype=np.int64), np.array(literals, dtype=bool),
+            np.array(lengths, dtype=np.int64), end)
+
+
+def varint_rle_decompress(compressed_data: bytes) -> bytes:
+    """Восстанавливает данные, сжатые varint_rle_compress."""
+    payload_starts, is_literal, lengths, end = _scan_varint_records(compressed_data)
+    if end != len(compressed_data):
+        raise ValueError("Некорректные данные RLE: обрезана последняя запись")
+    return expand_records(compressed_data, payload_starts, is_literal, lengths)
+
+
+# --- Выбор формата ---
+
+RLE_FORMAT_PACKBITS = 0
+RLE_FORMAT_FLAG = 1
+RLE_FORMAT_VARINT = 2
+
+# номер формата -> (сжатие, распаковка)
+RLE_FORMATS = {
+    RLE_FORMAT_PACKBITS: (packbits_rle_compress, packbits_rle_decompress),
+    RLE_FORMAT_FLAG: (flag_rle_compress, flag_rle_decompress),
+    RLE_FORMAT_VARINT: (varint_rle_compress, varint_rle_decompress),
+}
+
+
+def rle_encode(data: bytes, rle_format: int = RLE_FORMAT_VARINT) -> bytes:
+    """Сжимает данные RLE выбранного формата; первый байт потока - номер формата."""
+    if rle_format not in RLE_FORMATS:
+        raise ValueError(f"Неизвестный формат RLE: {rle_format}")
+    compress, _ = RLE_FORMATS[rle_format]
+    return bytes([rle_format]) + compress(data)
+
+
+def rle_decode(compressed_data: bytes) -> bytes:
+    """Восстанавливает данные, сжатые rle_encode (формат - по первому байту)."""
+    if len(compressed_data) == 0 or compressed_data[0] not in RLE_FORMATS:
+        raise ValueError("Некорректные данные RLE: неизвестный формат")
+    _, decompress = RLE_FORMATS[compressed_data[0]]
+    return decompress(compressed_data[1:])
+
+
+# --- Потоковое RLE (формат varint) ---
+#
+# Файл читается порциями по chunk_size байт, память не зависит от размера файла.
+# Между порциями переносится состояние:
+#   - открытая длинная серия - только байт и длина (серия может быть любой длины);
+#   - неполный блок литералов (меньше VARINT_MAX_LITERAL байт) и короткая серия
+#     в конце порции, которая ещё может стать длинной.
+# Записи, которые уже не могут измениться от следующих данных, пишутся сразу,
+# поэтому результат совпадает байт в байт с rle_encode(data, RLE_FORMAT_VARINT).
+
+RLE_STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+def _varint(value: int) -> bytes:
+    """Кодирует число в varint (LEB128)."""
+    encoded = bytearray()
+    while value >= 0x80:
+        encoded.append(value & 0x7F | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def _run_record(value: int, length: int) -> bytes:
+    """Запись varint для серии (без материализации серии)."""
+    return _varint(((length - VARINT_MIN_RUN) << 1) | 1) + bytes([value])
+
+
+def rle_compress_stream(source, destination, chunk_size: int = RLE_STREAM_CHUNK_SIZE) -> int:
+    """
+    Сжимает файловый объект source в destination порциями по chunk_size байт.
+    Возвращает количество записанных байт.
+    """
+    written = destination.write(bytes([RLE_FORMAT_VARINT]))
+    pending = np.zeros(0, dtype=np.uint8)
+    run_value, run_length = 0, 0
+    while True:
+        chunk = np.frombuffer(source.read(chunk_size), dtype=np.uint8)
+        if len(chunk) == 0:
+            break
+        if run_length:
+            # Продолжение открытой серии: пишется, только когда серия закончилась
+            different = np.flatnonzero(chunk != run_value)
+            if len(different) == 0:
+                run_length += len(chunk)
+                continue
+            run_length += int(different[0])
+            written += destination.write(_run_record(run_value, run_length))
+            chunk = chunk[different[0]:]
+            run_length = 0
+
+        symbols = np.concatenate([pending, chunk])
+        changes = np.flatnonzero(np.diff(symbols))
+        tail_start = int(changes[-1]) + 1 if len(changes) else 0
+        tail_length = len(symbols) - tail_start
+        record_lengths, is_literal = _split_records(symbols[:tail_start])
+        if tail_length >= VARINT_MIN_RUN:
+            # Длинная серия в конце: промежуток перед ней закончен
+            run_value, run_length = int(symbols[-1]), tail_length
+            pending = np.zeros(0, dtype=np.uint8)
+        else:
+            # Неполный блок литералов ждёт следующих данных вместе с короткой серией
+            keep = len(record_lengths) > 0 and is_literal[-1] and record_lengths[-1] < VARINT_MAX_LITERAL
+            if keep:
+                tail_start -= int(record_lengths[-1])
+                record_lengths, is_literal = record_lengths[:-1], is_literal[:-1]
+            pending = symbols[tail_start:].copy()
+        if len(record_lengths):
+            written += destination.write(_encode_records(symbols[:tail_start], record_lengths, is_literal))
+
+    if run_length:
+        written += destination.write(_run_record(run_value, run_length))
+    elif len(pending):
+        written += destination.write(varint_rle_compress(pending.tobytes()))
+    return written
+
+
+def _write_records(destination, buffer: bytes, payload_starts: np.ndarray, is_literal: np.ndarray,
+                   lengths: np.ndarray, chunk_size: int) -> int:
+    """
+    Пишет записи так, чтобы за один раз собиралось не больше chunk_size байт выхода:
+    подряд идущие записи объединяются в пачки, серия длиннее chunk_size пишется частями.
+    """
+    written = 0
+    batch_start = 0
+    batch_length = 0
+    for record, length in enumerate(lengths.tolist() + [None]):
+        if length is not None and batch_length + length <= chunk_size:
+            batch_length += length
+            continue
+        if batch_start < record:
+            part = slice(batch_start, record)
+            written += destination.write(expand_records(buffer, payload_starts[part], is_literal[part],
+                                                        lengths[part]))
+        if length is None:
+            break
+        if is_literal[record]:
+            # Литералы не длиннее VARINT_MAX_LITERAL - начинают новую пачку
+            batch_start, batch_length = record, length
+            continue
+        value = buffer[payload_starts[record]:payload_starts[record] + 1]
+        while length:
+            piece = min(length, chunk_size)
+            written += destination.write(value * piece)
+            length -= piece
+        batch_start, batch_length = record + 1, 0
+    return written
+
+
+def rle_decompress_stream(source, destination, chunk_size: int = RLE_STREAM_CHUNK_SIZE) -> int:
+    """
+    Восстанавливает данные, сжатые rle_compress_stream (или rle_encode в формате varint),
+    читая source порциями по chunk_size байт. Возвращает количество записанных байт.
+    """
+    if source.read(1) != bytes([RLE_FORMAT_VARINT]):
+        raise ValueError("Некорректные данные RLE: потоковая распаковка поддерживает только формат varint")
+    written = 0
+    buffer = b""
+    while True:
+        chunk = source.read(chunk_size)
+        buffer = buffer + chunk
+        payload_starts, is_literal, lengths, end = _scan_varint_records(buffer)
+        written += _write_records(destination, buffer, payload_starts, is_literal, lengths, chunk_size)
+        buffer = buffer[end:]
+        if not chunk:
+            break
+    if buffer:
+        raise ValueError("Некорректные данные RLE: обрезана последняя запись")
+    return written
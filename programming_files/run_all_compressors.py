@@ -1,14 +1,16 @@
 import os
 import time
+from functools import partial
 from comp_LZ77_HA import process_file_with_lz77_huffman
 from comp_BWT_RLE import process_file_in_blocks
 from comp_LZ78 import process_file_with_lz78
 from comp_LZ78_HA import process_file_with_lz78_huffman
 from comp_LZ77 import process_file_with_lz77_optimized
 from comp_LZ77_HA import process_file_with_lz77_huffman
-from comp_RLE import process_file_nontext_1
+from comp_RLE import process_file_nontext_1 as process_file_nontext_1_rle
 from comp_HA import process_file_nontext_1
 from comp_BWT_RLE_MTF_HA import process_with_bwt_rle_mtf_ha
+from entropy_coders import CODER_RANGE, CODER_TANS
 # Импортируйте остальные алгоритмы по аналогии
 
 def format_size(size_in_bytes):
@@ -66,7 +68,7 @@ algorithms = [
     },
     {
         'name': 'RLE',
-        'function': process_file_nontext_1,
+        'function': process_file_nontext_1_rle,
         'dir': 'RLE'
     },
     {
@@ -78,7 +80,55 @@ algorithms = [
         'name': 'BWT+RLE+MTF+HA',
         'function': process_with_bwt_rle_mtf_ha,
         'dir': 'BWT+RLE+MTF+HA'
-    }     
+    },
+    # Те же конвейеры с range-кодером вместо Хаффмана - для сравнения скорости и степени сжатия
+    {
+        'name': 'LZ77+RC',
+        'function': partial(process_file_with_lz77_huffman, coder=CODER_RANGE),
+        'dir': 'LZ77+RC'
+    },
+    {
+        'name': 'LZ78+RC',
+        'function': partial(process_file_with_lz78_huffman, coder=CODER_RANGE),
+        'dir': 'LZ78+RC'
+    },
+    {
+        'name': 'BWT+RLE+MTF+RC',
+        'function': partial(process_with_bwt_rle_mtf_ha, coder=CODER_RANGE),
+        'dir': 'BWT+RLE+MTF+RC'
+    },
+    # ... и с табличным ANS
+    {
+        'name': 'LZ77+tANS',
+        'function': partial(process_file_with_lz77_huffman, coder=CODER_TANS),
+        'dir': 'LZ77+tANS'
+    },
+    {
+        'name': 'LZ78+tANS',
+        'function': partial(process_file_with_lz78_huffman, coder=CODER_TANS),
+        'dir': 'LZ78+tANS'
+    },
+    {
+        'name': 'BWT+RLE+MTF+tANS',
+        'function': partial(process_with_bwt_rle_mtf_ha, coder=CODER_TANS),
+        'dir': 'BWT+RLE+MTF+tANS'
+    },
+    # С упаковкой малого алфавита по битовым плоскостям (для бинарных изображений)
+    {
+        'name': 'BP+RLE',
+        'function': partial(process_file_nontext_1_rle, bitplanes=True),
+        'dir': 'BP+RLE'
+    },
+    {
+        'name': 'BP+LZ77+HA',
+        'function': partial(process_file_with_lz77_huffman, bitplanes=True),
+        'dir': 'BP+LZ77+HA'
+    },
+    {
+        'name': 'BP+LZ78+HA',
+        'function': partial(process_file_with_lz78_huffman, bitplanes=True),
+        'dir': 'BP+LZ78+HA'
+    }
     
 ]
 
@@ -0,0 +1,95 @@
+import os
+import numpy as np
+
+# --- Статистика символов: гистограмма, энтропия, средняя длина кода ---
+
+ALPHABET_SIZE = 256
+# Размер порции при подсчёте по файлу (через memmap файл не читается целиком)
+CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def count_symb(data, alphabet_size: int = ALPHABET_SIZE) -> np.ndarray:
+    """
+    Подсчитывает частоту символов в данных (bytes, bytearray или массив NumPy).
+    """
+    if isinstance(data, np.ndarray):
+        symbols = data
+    else:
+        symbols = np.frombuffer(data, dtype=np.uint8)
+    return np.bincount(symbols, minlength=alphabet_size).astype(np.int64)
+
+
+def count_file_symbols(file_path, chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+    """
+    Подсчитывает частоту байт в файле, отображая его в память и накапливая
+    гистограмму по порциям.
+    """
+    counter = np.zeros(ALPHABET_SIZE, dtype=np.int64)
+    if os.path.getsize(file_path) == 0:
+        return counter
+    mapped = np.memmap(file_path, dtype=np.uint8, mode='r')
+    for start in range(0, len(mapped), chunk_size):
+        counter += np.bincount(mapped[start:start + chunk_size], minlength=ALPHABET_SIZE)
+    del mapped
+    return counter
+
+
+def entropy_from_counts(counter) -> float:
+    """
+    Вычисляет энтропию (бит/символ) по гистограмме по формуле Шеннона.
+    """
+    counter = np.asarray(counter, dtype=np.float64)
+    total_symbols = counter.sum()
+    if total_symbols == 0:
+        return 0.0
+    probabilities = counter[counter > 0] / total_symbols
+    return float(-np.sum(probabilities * np.log2(probabilities)))
+
+
+def average_code_length_from_counts(counter, code_lengths) -> float:
+    """
+    Вычисляет среднюю длину кода (бит/символ) по гистограмме и длинам кодов.
+    """
+    counter = np.asarray(counter, dtype=np.int64)
+    total_symbols = counter.sum()
+    if total_symbols == 0:
+        return 0.0
+    code_lengths = np.asarray(code_lengths, dtype=np.int64)
+    return float(np.dot(counter[:len(code_lengths)], code_lengths) / total_symbols)
+
+
+def calculate_entropy(data) -> float:
+    """
+    Вычисляет энтропию данных по формуле Шеннона.
+    """
+    return entropy_from_counts(count_symb(data))
+
+
+def calculate_average_code_length(code_lengths, data) -> float:
+    """
+    Вычисляет среднюю длину кода (бит/символ) для данных.
+    """
+    return average_code_length_from_counts(count_symb(data), code_lengths)
+
+
+def symbol_stats(data, code_lengths=None) -> tuple[np.ndarray, float, float]:
+    """
+    За один проход по данным возвращает гистограмму, энтропию нулевого порядка
+    и среднюю длину кода (0.0, если длины кодов не переданы).
+    """
+    counter = count_symb(data)
+    average_length = 0.0
+    if code_lengths is not None:
+        average_length = average_code_length_from_counts(counter, code_lengths)
+    return counter, entropy_from_counts(counter), average_length
+
+
+def file_symbol_stats(file_path, code_lengths=None) -> tuple[np.ndarray, float, float]:
+    """
+    То же, что symbol_stats, но для файла произвольного размера.
+    """
+    counter = count_file_symbols(file_path)
+    average_length = 0.0
+    if code_lengths is not None:
+        average_length = average_code_length_from_counts(counter, code_lengths)
+    return counter, entropy_from_counts(counter), average_length
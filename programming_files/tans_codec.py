@@ -0,0 +1,169 @@
+import numpy as np
+from stats import count_symb
+from huffman_codec import pack_codes
+
+# --- Табличный ANS (tANS / FSE) ---
+#
+# Частоты нормируются к сумме L = 2^TABLE_LOG, символы раскладываются по таблице
+# из L состояний. Шаг декодера - поиск в таблице по состоянию (символ, число бит,
+# база следующего состояния) плюс чтение нескольких бит.
+# Кодирование идёт с конца данных, поэтому декодер читает поток вперёд.
+#
+# Формат сжатого потока:
+#   4 байта   - количество символов (big-endian)
+#   1 байт    - TABLE_LOG
+#   32 байта  - битовая маска встречающихся символов ((alphabet_size + 7) // 8
+#               байт для алфавита другого размера, см. tans_compress_symbols)
+#   2 байта   - нормированная частота каждого встречающегося символа
+#   2 байта   - конечное состояние кодера (начальное состояние декодера)
+#   далее     - биты, старший бит первым, дополненные до байта
+
+TABLE_LOG = 11
+ALPHABET_SIZE = 256
+
+
+def normalize_counts(counter, table_log: int = TABLE_LOG) -> np.ndarray:
+    """
+    Масштабирует частоты к сумме 2^table_log; каждый встречающийся символ
+    получает не меньше 1. Погрешность округления забирает самый частый символ.
+    """
+    counter = np.asarray(counter, dtype=np.int64)
+    table_size = 1 << table_log
+    total = counter.sum()
+    normalized = np.zeros(len(counter), dtype=np.int64)
+    if total == 0:
+        return normalized
+    present = counter > 0
+    normalized[present] = np.maximum(counter[present] * table_size // total, 1)
+
+    # Избыток снимаем с самых частых символов, не опуская их ниже 1
+    while normalized.sum() > table_size:
+        largest = int(np.argmax(normalized))
+        normalized[largest] -= min(normalized.sum() - table_size, normalized[largest] - 1)
+    normalized[int(np.argmax(counter))] += table_size - normalized.sum()
+    return normalized
+
+
+def spread_symbols(normalized, table_log: int = TABLE_LOG) -> np.ndarray:
+    """Раскладывает символы по таблице состояний с шагом, взаимно простым с её размером."""
+    table_size = 1 << table_log
+    step = (table_size >> 1) + (table_size >> 3) + 3
+    positions = (np.arange(table_size, dtype=np.int64) * step) & (table_size - 1)
+    table = np.empty(table_size, dtype=np.int64)
+    table[positions] = np.repeat(np.arange(len(normalized)), normalized)
+    return table
+
+
+def build_tables(normalized, table_log: int = TABLE_LOG) -> tuple:
+    """
+    Строит таблицы декодера (символ, число бит, база состояния для каждого из L
+    состояний) и таблицу кодера: для символа s и промежуточного состояния
+    y из [f_s, 2f_s) - новое состояние L + i.
+    """
+    table_size = 1 << table_log
+    symbols = spread_symbols(normalized, table_log)
+
+    # x_s - номер вхождения символа в таблицу, начиная с f_s (стабильный порядок позиций)
+    order = np.argsort(symbols, kind='stable')
+    starts = np.concatenate([[0], np.cumsum(normalized)[:-1]])
+    occurrence = np.empty(table_size, dtype=np.int64)
+    occurrence[order] = np.arange(table_size) - starts[symbols[order]]
+    x_s = normalized[symbols] + occurrence
+
+    bits = table_log - (np.floor(np.log2(x_s)).astype(np.int64))
+    bases = (x_s << bits) - table_size
+
+    encode_states = np.empty(table_size, dtype=np.int64)
+    encode_states[starts[symbols] + occurrence] = table_size + np.arange(table_size)
+    return symbols, bits, bases, encode_states, starts
+
+
+def tans_compress(data: bytes, table_log: int = TABLE_LOG) -> bytes:
+    return tans_compress_symbols(np.frombuffer(data, dtype=np.uint8), ALPHABET_SIZE, table_log)
+
+
+def tans_compress_symbols(symbols: np.ndarray, alphabet_size: int, table_log: int = TABLE_LOG) -> bytes:
+    """Сжимает массив символов алфавита из alphabet_size символов."""
+    counter = count_symb(symbols, alphabet_size)
+    normalized = normalize_counts(counter, table_log)
+    table_size = 1 << table_log
+
+    header = bytearray(len(symbols).to_bytes(4, 'big'))
+    header.append(table_log)
+    header.extend(np.packbits(counter > 0).tobytes())
+    for frequency in normalized[counter > 0]:
+        header.extend(int(frequency).to_bytes(2, 'big'))
+    if len(symbols) == 0:
+        return bytes(header) + bytes(2)
+
+    _, _, _, encode_states, starts = build_tables(normalized, table_log)
+    encode_states = encode_states.tolist()
+    frequencies = normalized.tolist()
+    starts = starts.tolist()
+    top_bits = [table_log - int(f).bit_length() + 1 for f in frequencies]
+
+    # Кодирование с конца: выдвигаем младшие биты, пока состояние не попадёт в [f_s, 2f_s)
+    state = table_size
+    values = []
+    widths = []
+    for symbol in reversed(symbols.tolist()):
+        frequency = frequencies[symbol]
+        nb = top_bits[symbol]
+        if (state >> nb) < frequency:
+            nb -= 1
+        values.append(state & ((1 << nb) - 1))
+        widths.append(nb)
+        state = encode_states[starts[symbol] + (state >> nb) - frequency]
+
+    # Декодер читает порции бит в обратном порядке их выдачи
+    values = np.array(values[::-1], dtype=np.uint32)
+    widths = np.array(widths[::-1], dtype=np.uint8)
+    total_bits = int(widths.sum(dtype=np.int64))
+    payload = pack_codes(np.arange(len(values)), values, widths, (total_bits + 7) // 8)
+
+    header.extend((state - table_size).to_bytes(2, 'big'))
+    return bytes(header) + payload.tobytes()
+
+
+def tans_decompress(compressed_data: bytes) -> bytes:
+    return tans_decompress_symbols(compressed_data, ALPHABET_SIZE).tobytes()
+
+
+def tans_decompress_symbols(compressed_data: bytes, alphabet_size: int) -> np.ndarray:
+    """Восстанавливает массив символов, сжатый tans_compress_symbols."""
+    n = int.from_bytes(compressed_data[:4], 'big')
+    table_log = compressed_data[4]
+    mask_size = (alphabet_size + 7) // 8
+    present = np.flatnonzero(np.unpackbits(np.frombuffer(compressed_data, dtype=np.uint8, count=mask_size,
+                                                         offset=5)))
+    offset = 5 + mask_size
+    normalized = np.zeros(alphabet_size, dtype=np.int64)
+    normalized[present] = np.frombuffer(compressed_data, dtype='>u2', count=len(present), offset=offset)
+    offset += 2 * len(present)
+    state = int.from_bytes(compressed_data[offset:offset + 2], 'big')
+    payload = compressed_data[offset + 2:]
+    symbol_type = np.uint8 if alphabet_size <= 256 else np.uint16
+    if n == 0:
+        return np.zeros(0, dtype=symbol_type)
+
+    symbols, bits, bases, _, _ = build_tables(normalized, table_log)
+    symbols = symbols.tolist()
+    bits = bits.tolist()
+    bases = bases.tolist()
+
+    decoded_data = [0] * n
+    buffer = 0
+    buffered = 0
+    position = 0
+    for i in range(n):
+        decoded_data[i] = symbols[state]
+        nb = bits[state]
+        while buffered < nb:
+            buffer = (buffer << 8) | (payload[position] if position < len(payload) else 0)
+            position += 1
+            buffered += 8
+        buffered -= nb
+        state = bases[state] + (buffer >> buffered)
+        buffer &= (1 << buffered) - 1
+
+    return np.array(decoded_data, dtype=symbol_type)